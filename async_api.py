@@ -0,0 +1,109 @@
+import os
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterator, Optional, Tuple, Union
+from extraction_cache import ExtractionCache
+from batch_test import parse_statement
+
+
+DEFAULT_CONCURRENCY = os.cpu_count() or 1
+
+Source = Union[str, os.PathLike, bytes, bytearray, Tuple[str, bytes]]
+
+
+def _normalize_source(source, index: int) -> Tuple[Union[str, bytes], str]:
+    # -> (what the parser opens, filename reported in the result)
+    if isinstance(source, tuple):
+        name, data = source
+        return bytes(data) if isinstance(data, memoryview) else data, name
+    if isinstance(source, (bytes, bytearray)):
+        return source, f"<bytes #{index}>"
+    if isinstance(source, memoryview):
+        # Process pools pickle arguments, and memoryviews don't pickle
+        return bytes(source), f"<bytes #{index}>"
+    path = os.fspath(source)
+    return path, os.path.basename(path)
+
+
+async def _iterate(sources):
+    if hasattr(sources, '__aiter__'):
+        async for source in sources:
+            yield source
+    else:
+        for source in sources:
+            yield source
+
+
+async def parse_many_async(sources, concurrency: int = DEFAULT_CONCURRENCY,
+                           executor: Optional[Executor] = None,
+                           timeout: Optional[float] = None,
+                           cache: Optional[ExtractionCache] = None,
+                           fast_path: bool = True) -> AsyncIterator[dict]:
+    # Yields one result dict per source, in completion order; each result's
+    # "filename" identifies its source. Sources may be paths, PDF bytes or
+    # (name, bytes) pairs, from a plain or async iterable. At most
+    # ``concurrency`` parses run at once, and sources are only pulled from
+    # the iterable as slots free up.
+    loop = asyncio.get_running_loop()
+    owns_executor = executor is None
+    if owns_executor:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=concurrency)
+
+    pending = set()
+    try:
+        index = 0
+        async for source in _iterate(sources):
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+
+            pdf_source, filename = _normalize_source(source, index)
+            index += 1
+            pending.add(loop.run_in_executor(executor, parse_statement, pdf_source, timeout,
+                                             cache, False, fast_path, filename))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if owns_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def parse_async(source: Source, executor: Optional[Executor] = None,
+                      timeout: Optional[float] = None,
+                      cache: Optional[ExtractionCache] = None,
+                      fast_path: bool = True) -> dict:
+    results = parse_many_async([source], 1, executor, timeout, cache, fast_path)
+    try:
+        return await results.__anext__()
+    finally:
+        await results.aclose()
+
+
+def main():
+    import sys
+    import json
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python async_api.py <pdf_file> [<pdf_file> ...]")
+        sys.exit(1)
+
+    async def run():
+        start = time.perf_counter()
+        async for result in parse_many_async(sys.argv[1:]):
+            print(json.dumps(result, default=str))
+        print(f"✓ Parsed {len(sys.argv) - 1} file(s) in {time.perf_counter() - start:.2f}s")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
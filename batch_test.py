@@ -1,58 +1,556 @@
 import os
-import json
+import time
+import signal
+import threading
+from typing import Optional
 from parser import CreditCardParser
-import pandas as pd
+from extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, file_sha256
+from result_sinks import SINK_TYPES, open_sink, export_excel, iter_jsonl
+from checkpoint import CheckpointManifest, DEFAULT_CHECKPOINT_PATH, read_record_at
+from instrumentation import ParseTimings, ProfileReport
+from watcher import open_watcher
+from duplicates import DuplicateIndex, duplicate_result, statement_fingerprint
+from pattern_stats import PatternStats, DEFAULT_STATS_PATH, DEFAULT_SAMPLE_EVERY
+from result_store import ResultStore, DEFAULT_STORE_PATH
+from work_queue import (ShardQueue, DEFAULT_SHARD_SIZE, DEFAULT_LEASE_SECONDS,
+                        default_worker_id)
+from summary import SummaryCounters, print_summary
 from datetime import datetime
 
 
+class FileTimeout(BaseException):
+    # BaseException so the broad ``except Exception`` blocks inside the
+    # parser cannot swallow it and report a half-extracted statement.
+    pass
+
+
+def _raise_file_timeout(signum, frame):
+    raise FileTimeout()
+
+
+def _stop_watching(signum, frame):
+    raise KeyboardInterrupt()
+
+
+def _stopped(stop: Optional[threading.Event], done: int, pdf_files: list) -> bool:
+    if stop is None or not stop.is_set():
+        return False
+    print(f"\n⚠ Lease lost; stopping with {len(pdf_files) - done} of {len(pdf_files)} "
+          f"file(s) left")
+    return True
+
+
+def parse_statement(pdf_path: str, timeout: Optional[float] = None,
+                    cache: Optional[ExtractionCache] = None,
+                    profile: bool = False, fast_path: bool = True,
+                    filename: Optional[str] = None, fingerprint: bool = False,
+                    memory_limit_mb: Optional[float] = None, page_workers: int = 0,
+                    pattern_stats: Optional[PatternStats] = None) -> dict:
+    # pdf_path may also be the statement's bytes, in which case filename names it
+    pdf_file = filename or os.path.basename(pdf_path)
+    # Signal handlers can only be installed from the main thread
+    use_alarm = (bool(timeout) and hasattr(signal, 'SIGALRM')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_file_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    
+    timings = ParseTimings() if profile else None
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        parser = CreditCardParser(pdf_path, cache=cache, timings=timings, fast_path=fast_path,
+                                  memory_limit_mb=memory_limit_mb, page_workers=page_workers,
+                                  pattern_stats=pattern_stats)
+        result = parser.parse()
+        if pattern_stats is not None:
+            pattern_stats.save_if_due()
+        result['filename'] = pdf_file
+        result['status'] = 'SUCCESS'
+        if parser.pattern_blowups:
+            result['pattern_blowups'] = parser.pattern_blowups
+        if fingerprint:
+            statement_hash = statement_fingerprint(parser.pages.page_text(0), result)
+            if statement_hash:
+                result['fingerprint'] = statement_hash
+    except FileTimeout:
+        result = _error_result(pdf_file, f"Timed out after {timeout}s")
+    except Exception as e:
+        result = _error_result(pdf_file, str(e))
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    
+    if timings is not None:
+        timings.add_phase('total', time.perf_counter() - start_wall,
+                          time.process_time() - start_cpu)
+        # Popped by BatchTester before the result reaches the sinks
+        result['timings'] = timings.to_dict()
+    return result
+
+
+def _error_result(pdf_file: str, message: str) -> dict:
+    return {
+        'filename': pdf_file,
+        'status': 'ERROR',
+        'error_message': message,
+        'issuer': 'UNKNOWN'
+    }
+
+
 class BatchTester:
     
-    def __init__(self, statements_dir: str):
+    def __init__(self, statements_dir: str, workers: int = 1,
+                 timeout: Optional[float] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 formats: tuple = ('jsonl',), excel: bool = True,
+                 chunk_size: int = 1000,
+                 checkpoint_path: str = DEFAULT_CHECKPOINT_PATH, resume: bool = False,
+                 profile_top: int = 0, fast_path: bool = True, dedupe: bool = True,
+                 memory_limit_mb: Optional[float] = None, normalize: bool = False,
+                 page_workers: int = 0, pattern_stats: Optional[PatternStats] = None,
+                 store_path: Optional[str] = None):
         self.statements_dir = statements_dir
-        self.results = []
+        self.workers = workers
+        self.timeout = timeout
+        self.cache = cache
+        self.formats = formats
+        self.excel = excel
+        self.chunk_size = chunk_size
+        self.summary = SummaryCounters()
+        self.sinks = []
+        self.checkpoint = CheckpointManifest(checkpoint_path)
+        self.resume = resume
+        self.profile = ProfileReport(profile_top) if profile_top else None
+        self.fast_path = fast_path
+        self.memory_limit_mb = memory_limit_mb
+        self.normalize = normalize
+        self.page_workers = page_workers
+        self.pattern_stats = pattern_stats
+        # SQLite result store, upserted by content hash; opened per run
+        self.store_path = store_path
+        self.store = None
+        # Paths whose current checkpoint record is included in self.summary
+        self._counted = set()
+        self.duplicates = DuplicateIndex() if dedupe else None
+        # Content hashes taken for duplicate detection, reused by the
+        # checkpoint and the result store
+        self._hashes = {}
+        # (record, sha256) of files skipped on resume
+        self._resumed = []
     
-    def test_all_statements(self):
+    def test_all_statements(self, watch: bool = False, poll_interval: float = 2.0,
+                            polling: bool = False):
         print("=" * 70)
         print("CREDIT CARD STATEMENT PARSER - BATCH TEST")
         print("=" * 70)
         print()
         
-        pdf_files = [f for f in os.listdir(self.statements_dir) 
-                         if f.lower().endswith('.pdf')]
+        # Started before listing so nothing arriving in between is missed
+        watcher = open_watcher(self.statements_dir, poll_interval, polling) if watch else None
         
-        if not pdf_files:
+        pdf_files = self._list_pdfs()
+        
+        if not pdf_files and watcher is None:
             print(f"No PDF files found in {self.statements_dir}")
             return
         
         print(f"Found {len(pdf_files)} PDF file(s) to process\n")
         
+        resuming = self.resume and self.checkpoint.load()
+        if resuming:
+            output_prefix = self.checkpoint.output_prefix
+            pdf_files = self._skip_completed(pdf_files)
+        else:
+            if self.resume:
+                print(f"No checkpoint found at {self.checkpoint.path}, starting a new run\n")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_prefix = f"parser_results_{timestamp}"
+        
+        if resuming:
+            self.checkpoint.trim_output(f"{output_prefix}.jsonl")
+        self._open_sinks(output_prefix, append=resuming)
+        self.checkpoint.start(output_prefix, resume=resuming)
+        if self.store_path:
+            self.store = ResultStore(self.store_path, chunk_size=self.chunk_size)
+            # Records from before a crash may not have reached the store
+            # yet; upserting them again is harmless
+            for previous, content_hash in self._resumed:
+                self.store.write(previous, content_hash)
+        try:
+            self._process(pdf_files)
+            if watcher is not None:
+                self._watch(watcher)
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self._close_sinks()
+            self.checkpoint.close()
+            if self.store is not None:
+                self.store.close()
+            if self.pattern_stats is not None:
+                self.pattern_stats.save()
+        
+        typed = self._load_typed()
+        self._generate_summary(typed)
+        
+        if self.profile is not None:
+            self.profile.print_report()
+        
+        self._export_results(typed)
+    
+    def _list_pdfs(self) -> list:
+        return sorted(f for f in os.listdir(self.statements_dir)
+                      if f.lower().endswith('.pdf'))
+    
+    def create_shards(self, queue: ShardQueue, shard_size: int = DEFAULT_SHARD_SIZE):
+        # Coordinator: partition the directory's PDFs into the shared queue
+        pdf_files = self._list_pdfs()
+        created = queue.create(pdf_files, shard_size)
+        if created:
+            print(f"✓ Queued {len(pdf_files)} PDF file(s) as {created} shard(s) in {queue.path}")
+        else:
+            print(f"Queue {queue.path} already has shards; leaving it as it is")
+        progress = queue.progress()
+        print(f"Shards: {progress['done']}/{progress['total']} done, {progress['leased']} leased "
+              f"({progress['expired']} expired), {progress['pending']} pending")
+    
+    def run_worker(self, queue: ShardQueue, worker: str, poll_interval: float = 2.0):
+        print("=" * 70)
+        print(f"CREDIT CARD STATEMENT PARSER - SHARD WORKER ({worker})")
+        print("=" * 70)
+        
+        os.makedirs(queue.results_dir, exist_ok=True)
+        if self.store_path:
+            self.store = ResultStore(self.store_path, chunk_size=self.chunk_size)
+        completed = 0
+        try:
+            while True:
+                shard = queue.claim(worker)
+                if shard is None:
+                    progress = queue.progress()
+                    if not progress['pending'] and not progress['leased']:
+                        break
+                    # The rest is leased to other workers; wait in case one
+                    # of them dies and its lease expires
+                    time.sleep(poll_interval)
+                    continue
+                
+                print(f"\n▶ Shard {shard.id}: {len(shard.files)} file(s), attempt {shard.attempts}")
+                prefix = os.path.join(queue.results_dir,
+                                      f"shard_{shard.id:05d}_{worker}_{shard.attempts}")
+                with queue.leased(shard, worker) as lost:
+                    result_path = self._process_shard(shard.files, prefix, lost)
+                if not lost.is_set() and queue.complete(shard.id, worker, result_path):
+                    completed += 1
+                    print(f"\n✓ Shard {shard.id} done: {result_path}")
+                else:
+                    print(f"\n⚠ Lease on shard {shard.id} expired and it was reassigned; "
+                          f"discarding {result_path}")
+        finally:
+            if self.store is not None:
+                self.store.close()
+        
+        print(f"\n✓ Worker {worker} finished {completed} shard(s)")
+        self._generate_summary()
+    
+    def _process_shard(self, pdf_files: list, output_prefix: str,
+                       lost: Optional[threading.Event] = None) -> str:
+        # Stops at the next file boundary once lost is set: the shard has
+        # been handed to another worker, which parses it again from the start
+        self._open_sinks(output_prefix)
+        # Shards are retried whole, so this manifest only serves _record_result
+        self.checkpoint = CheckpointManifest(output_prefix + '.checkpoint.jsonl')
+        self.checkpoint.start(output_prefix)
+        try:
+            self._process(pdf_files, lost)
+        finally:
+            self._close_sinks()
+            self.checkpoint.close()
+            if self.store is not None:
+                self.store.flush()
+            if self.pattern_stats is not None:
+                self.pattern_stats.save()
+        return self.sinks[0].path
+    
+    def merge_shards(self, queue: ShardQueue):
+        print("=" * 70)
+        print("CREDIT CARD STATEMENT PARSER - MERGE SHARDS")
+        print("=" * 70)
+        
+        progress = queue.progress()
+        if progress['done'] < progress['total']:
+            print(f"\n⚠ {progress['total'] - progress['done']} of {progress['total']} shard(s) "
+                  f"not finished; merging the {progress['done']} that are")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._open_sinks(f"parser_results_{timestamp}")
+        try:
+            for path in queue.result_paths():
+                for record in iter_jsonl(path):
+                    record = self._merged_record(record)
+                    for sink in self.sinks:
+                        sink.write(record)
+                    self.summary.add(record)
+        finally:
+            self._close_sinks()
+        
+        typed = self._load_typed()
+        self._generate_summary(typed)
+        self._export_results(typed)
+    
+    def _merged_record(self, record: dict) -> dict:
+        # Workers only see duplicates within their own shards; fingerprints
+        # catch copies that landed in different shards (exact copies included)
+        if self.duplicates is None:
+            return record
+        if record['status'] == 'SUCCESS' and record.get('fingerprint'):
+            canonical = self.duplicates.claim_fingerprint(record['fingerprint'], record['filename'])
+            if canonical:
+                self.duplicates.redirect(record['filename'], canonical)
+                return duplicate_result(record['filename'], canonical, 'fingerprint')
+        elif record['status'] == 'DUPLICATE':
+            record['duplicate_of'] = self.duplicates.resolve(record['duplicate_of'])
+        return record
+    
+    def _skip_completed(self, pdf_files: list) -> list:
+        remaining = []
+        for pdf_file in pdf_files:
+            pdf_path = os.path.join(self.statements_dir, pdf_file)
+            entry = self.checkpoint.completed_entry(pdf_path)
+            previous = entry and read_record_at(entry['output'], entry['offset'])
+            if previous:
+                self._resumed.append((previous, entry['sha256']))
+                self.summary.add(previous)
+                self._counted.add(entry['path'])
+                if self.duplicates is not None and previous['status'] == 'DUPLICATE':
+                    self.duplicates.add_member(pdf_file, previous['duplicate_of'])
+                elif self.duplicates is not None:
+                    self.duplicates.claim_hash(entry['sha256'], pdf_file)
+                    if previous.get('fingerprint'):
+                        self.duplicates.claim_fingerprint(previous['fingerprint'], pdf_file)
+            else:
+                remaining.append(pdf_file)
+        
+        skipped = len(pdf_files) - len(remaining)
+        print(f"Resuming: {skipped} file(s) already processed, {len(remaining)} to go\n")
+        return remaining
+    
+    def _open_sinks(self, path_prefix: str, append: bool = False):
+        # JSONL is always written: it is the stream the Excel export and the
+        # checkpoint offsets refer to
+        formats = ['jsonl'] + [fmt for fmt in self.formats if fmt != 'jsonl']
+        self.sinks = []
+        try:
+            for fmt in formats:
+                self.sinks.append(open_sink(fmt, path_prefix, append=append,
+                                            chunk_size=self.chunk_size))
+        except Exception:
+            self._close_sinks()
+            raise
+    
+    def _close_sinks(self):
+        for sink in self.sinks:
+            sink.close()
+    
+    def _process(self, pdf_files: list, stop: Optional[threading.Event] = None):
+        if self.workers > 1:
+            self._process_parallel(pdf_files, stop)
+        else:
+            self._process_serial(pdf_files, stop)
+    
+    def _watch(self, watcher):
+        print(f"\nWatching {self.statements_dir} for new or changed statements "
+              f"({watcher.name}); press Ctrl+C to stop")
+        # SIGTERM (e.g. from a service manager) stops the watch as cleanly as Ctrl+C
+        previous_handler = signal.signal(signal.SIGTERM, _stop_watching)
+        try:
+            while True:
+                changed, orphans = [], []
+                for pdf_file in watcher.wait():
+                    pdf_path = os.path.join(self.statements_dir, pdf_file)
+                    if (not pdf_file.lower().endswith('.pdf') or not os.path.isfile(pdf_path)
+                            or self.checkpoint.completed_entry(pdf_path)):
+                        continue
+                    orphans.extend(self._retract_previous(pdf_path))
+                    changed.append(pdf_file)
+                # Duplicates of a file that changed are parsed again after it:
+                # the first one still alike becomes the new original
+                for pdf_file in orphans:
+                    pdf_path = os.path.join(self.statements_dir, pdf_file)
+                    if pdf_file in changed or not os.path.isfile(pdf_path):
+                        continue
+                    self._retract_previous(pdf_path)
+                    changed.append(pdf_file)
+                
+                if changed:
+                    self._process(changed)
+                    if self.store is not None:
+                        self.store.flush()
+                    summary = self.summary
+                    print(f"\nRunning total: {summary.total} processed, "
+                          f"{summary.successful} successful, {summary.failed} failed")
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+    
+    def _retract_previous(self, pdf_path: str) -> list:
+        # A changed file replaces its earlier result in the live counters.
+        # Returns the files that were recorded as its duplicates.
+        path = os.path.abspath(pdf_path)
+        entry = self.checkpoint.entries.get(path)
+        if path not in self._counted or entry is None:
+            return []
+        previous = read_record_at(entry['output'], entry['offset'])
+        if previous:
+            self.summary.remove(previous)
+        self._counted.discard(path)
+        if self.duplicates is None:
+            return []
+        return self.duplicates.forget(os.path.basename(pdf_path))
+    
+    def _process_serial(self, pdf_files: list, stop: Optional[threading.Event] = None):
         for idx, pdf_file in enumerate(pdf_files, 1):
+            if _stopped(stop, idx - 1, pdf_files):
+                return
             pdf_path = os.path.join(self.statements_dir, pdf_file)
             print(f"\n[{idx}/{len(pdf_files)}] Processing: {pdf_file}")
             print("-" * 70)
             
-            try:
-                parser = CreditCardParser(pdf_path)
-                result = parser.parse()
-                result['filename'] = pdf_file
-                result['status'] = 'SUCCESS'
-                
-                self._display_result(result)
-                self.results.append(result)
+            result = self._exact_duplicate(pdf_path) or parse_statement(
+                pdf_path, self.timeout, self.cache, self.profile is not None,
+                self.fast_path, fingerprint=self.duplicates is not None,
+                memory_limit_mb=self.memory_limit_mb, page_workers=self.page_workers,
+                pattern_stats=self.pattern_stats)
+            self._record_result(result, pdf_path)
+    
+    def _process_parallel(self, pdf_files: list, stop: Optional[threading.Event] = None):
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        
+        print(f"Using {self.workers} worker processes\n")
+        
+        pdf_paths = [os.path.join(self.statements_dir, pdf_file) for pdf_file in pdf_files]
+        # Exact copies are settled up front and never reach the pool
+        duplicates = [self._exact_duplicate(pdf_path) for pdf_path in pdf_paths]
+        
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = {idx: self._submit(executor, pdf_path)
+                   for idx, (pdf_path, duplicate) in enumerate(zip(pdf_paths, duplicates))
+                   if not duplicate}
+        # Results of files rerun after a worker died
+        rerun = {}
+        try:
+            # Collected in submission order so the log and the exported
+            # results are identical to a serial run.
+            for idx, pdf_file in enumerate(pdf_files):
+                if _stopped(stop, idx, pdf_files):
+                    executor.shutdown(cancel_futures=True)
+                    return
+                result = duplicates[idx] or rerun.pop(idx, None)
+                if result is None:
+                    try:
+                        result = futures[idx].result()
+                    except BrokenProcessPool:
+                        executor = self._replace_broken_pool(executor, futures, idx,
+                                                             pdf_paths, rerun)
+                        result = rerun.pop(idx)
+                    except Exception as e:
+                        result = _error_result(pdf_file, f"Worker failed: {e}")
                 
-            except Exception as e:
-                error_result = {
-                    'filename': pdf_file,
-                    'status': 'ERROR',
-                    'error_message': str(e),
-                    'issuer': 'UNKNOWN'
-                }
-                print(f"❌ Error: {str(e)}")
-                self.results.append(error_result)
+                print(f"\n[{idx + 1}/{len(pdf_files)}] Processing: {pdf_file}")
+                print("-" * 70)
+                self._record_result(result, pdf_paths[idx])
+        finally:
+            executor.shutdown()
+    
+    def _submit(self, executor, pdf_path: str):
+        return executor.submit(parse_statement, pdf_path,
+                               self.timeout, self.cache, self.profile is not None,
+                               self.fast_path, fingerprint=self.duplicates is not None,
+                               memory_limit_mb=self.memory_limit_mb,
+                               page_workers=self.page_workers,
+                               pattern_stats=self.pattern_stats)
+    
+    def _replace_broken_pool(self, executor, futures: dict, first: int,
+                             pdf_paths: list, rerun: dict):
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
         
-        self._generate_summary()
+        # A worker that dies (segfault, OOM kill) fails every unfinished
+        # future with it. Files are handed to workers in submission order and
+        # at most one past the pool size ahead, so only that many of the
+        # unfinished ones can have been running: rerun each of those alone
+        # in a process of its own, and resubmit the rest to a fresh pool.
+        executor.shutdown()
+        unfinished = [idx for idx in sorted(futures) if idx >= first
+                      and isinstance(futures[idx].exception(), BrokenProcessPool)]
+        suspects, rest = unfinished[:self.workers + 1], unfinished[self.workers + 1:]
+        print(f"\n⚠ A worker process died; rerunning {len(suspects)} file(s) one at a time")
+        for idx in suspects:
+            with ProcessPoolExecutor(max_workers=1) as solo:
+                try:
+                    rerun[idx] = self._submit(solo, pdf_paths[idx]).result()
+                except Exception as e:
+                    rerun[idx] = _error_result(os.path.basename(pdf_paths[idx]),
+                                               f"Worker failed: {e}")
         
-        self._export_results()
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        for idx in rest:
+            futures[idx] = self._submit(executor, pdf_paths[idx])
+        return executor
+    
+    def _exact_duplicate(self, pdf_path: str) -> Optional[dict]:
+        if self.duplicates is None:
+            return None
+        try:
+            content_hash = file_sha256(pdf_path)
+        except OSError:
+            return None
+        self._hashes[pdf_path] = content_hash
+        pdf_file = os.path.basename(pdf_path)
+        canonical = self.duplicates.claim_hash(content_hash, pdf_file)
+        return canonical and duplicate_result(pdf_file, canonical, 'sha256')
+    
+    def _record_result(self, result: dict, pdf_path: str):
+        timings = result.pop('timings', None)
+        if self.profile is not None and timings is not None:
+            self.profile.add(result['filename'], timings)
+        
+        # Different bytes, same statement: keep only the first one's data
+        if self.duplicates is not None and result.get('fingerprint'):
+            canonical = self.duplicates.claim_fingerprint(result['fingerprint'], result['filename'])
+            if canonical:
+                self.duplicates.redirect(result['filename'], canonical)
+                result = duplicate_result(result['filename'], canonical, 'fingerprint')
+        if result['status'] == 'DUPLICATE':
+            result['duplicate_of'] = self.duplicates.resolve(result['duplicate_of'])
+            self.duplicates.add_member(result['filename'], result['duplicate_of'])
+        
+        if result['status'] == 'SUCCESS':
+            self._display_result(result)
+        elif result['status'] == 'DUPLICATE':
+            print(f"⧉ Duplicate of {result['duplicate_of']} (same {result['duplicate_match']})")
+        else:
+            print(f"❌ Error: {result['error_message']}")
+        
+        jsonl_sink = self.sinks[0]
+        offset = jsonl_sink.write(result)
+        for sink in self.sinks[1:]:
+            sink.write(result)
+        content_hash = self._hashes.pop(pdf_path, None)
+        if content_hash is None and self.store is not None:
+            try:
+                content_hash = file_sha256(pdf_path)
+            except OSError:
+                pass
+        # Only checkpointed once the result itself is safely on disk
+        self.checkpoint.record(pdf_path, result['status'], jsonl_sink.path, offset, content_hash)
+        if self.store is not None:
+            self.store.write(result, content_hash)
+        self.summary.add(result)
+        self._counted.add(os.path.abspath(pdf_path))
     
     def _display_result(self, result: dict):
         print(f"✓ Issuer: {result.get('issuer', 'N/A')}")
@@ -68,99 +566,202 @@ class BatchTester:
             print(f"  Statement Period: {result.get('statement_period', 'N/A')}")
             print(f"  Previous Balance: {result.get('previous_balance', 'N/A')}")
     
-    def _generate_summary(self):
-        print("\n" + "=" * 70)
-        print("SUMMARY")
-        print("=" * 70)
+    def _generate_summary(self, typed=None):
+        # From the typed table when --normalize built one, as normalize.py
+        # does; otherwise from the counters kept while parsing
+        if typed is None:
+            print_summary(self.summary)
+            return
+        from normalize import summarize
         
-        successful = sum(1 for r in self.results if r['status'] == 'SUCCESS')
-        failed = sum(1 for r in self.results if r['status'] == 'ERROR')
+        print_summary(summarize(typed))
+    
+    def _load_typed(self):
+        if not self.normalize or self.summary.total == 0:
+            return None
+        from normalize import load_results, normalize
         
-        if len(self.results) == 0:
-            print("No statements were processed.")
-            return
-            
-        print(f"\nTotal Statements Processed: {len(self.results)}")
-        print(f"✓ Successful: {successful}")
-        print(f"❌ Failed: {failed}")
-        
-        issuers = {}
-        for r in self.results:
-            if r['status'] == 'SUCCESS':
-                issuer = r.get('issuer', 'Unknown')
-                issuers[issuer] = issuers.get(issuer, 0) + 1
-        
-        if issuers:
-            print("\nIssuers Detected:")
-            for issuer, count in issuers.items():
-                print(f"  • {issuer}: {count} statement(s)")
-        
-        if successful > 0:
-            print("\nData Extraction Completeness:")
-            
-            common_fields = ['due_date', 'total_amount_due', 'card_last_4']
-            other_bank_fields = ['statement_period', 'previous_balance']
-            hdfc_fields = ['statement_date', 'credit_limit']
-            
-            hdfc_successful = sum(1 for r in self.results 
-                                if r['status'] == 'SUCCESS' and r.get('issuer') == 'HDFC Bank')
-            other_successful = successful - hdfc_successful
-            
-            for field in common_fields:
-                extracted = sum(1 for r in self.results 
-                                if r['status'] == 'SUCCESS' and r.get(field) is not None)
-                percentage = (extracted / successful) * 100
-                print(f"  • {field} (All): {extracted}/{successful} ({percentage:.1f}%)")
-
-            if other_successful > 0:
-                for field in other_bank_fields:
-                    extracted = sum(1 for r in self.results 
-                                    if r['status'] == 'SUCCESS' 
-                                    and r.get('issuer') != 'HDFC Bank' 
-                                    and r.get(field) is not None)
-                    percentage = (extracted / other_successful) * 100
-                    print(f"  • {field} (Others): {extracted}/{other_successful} ({percentage:.1f}%)")
-
-            if hdfc_successful > 0:
-                for field in hdfc_fields:
-                    extracted = sum(1 for r in self.results 
-                                    if r['status'] == 'SUCCESS' 
-                                    and r.get('issuer') == 'HDFC Bank' 
-                                    and r.get(field) is not None)
-                    percentage = (extracted / hdfc_successful) * 100
-                    print(f"  • {field} (HDFC): {extracted}/{hdfc_successful} ({percentage:.1f}%)")
-    
-    def _export_results(self):
-        if not self.results:
+        try:
+            return normalize(load_results(self.sinks[0].path))
+        except Exception as e:
+            print(f"⚠ Could not build typed results: {e}")
+            return None
+    
+    def _export_results(self, typed=None):
+        if self.summary.total == 0:
             return
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        json_filename = f"parser_results_{timestamp}.json"
-        with open(json_filename, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
-        print(f"\n✓ Results exported to: {json_filename}")
+        print()
+        for sink in self.sinks:
+            print(f"✓ Results exported to: {sink.path}")
+        if self.store is not None:
+            print(f"✓ Results stored in: {self.store.path}")
+        
+        jsonl_path = self.sinks[0].path
+        if self.excel:
+            excel_filename = jsonl_path[:-len('.jsonl')] + '.xlsx'
+            try:
+                export_excel(jsonl_path, excel_filename, key=self._checkpoint_key)
+                print(f"✓ Results exported to: {excel_filename}")
+            except Exception as e:
+                print(f"⚠ Could not export to Excel: {e}")
+        
+        if typed is not None:
+            self._export_typed(typed, jsonl_path)
+    
+    def _checkpoint_key(self, record: dict) -> str:
+        # The path the checkpoint manifest keys this record's file by
+        return os.path.abspath(os.path.join(self.statements_dir, record['filename']))
+    
+    def _export_typed(self, df, jsonl_path: str):
+        from normalize import issuer_statistics, print_statistics, write_typed_results
         
         try:
-            df = pd.DataFrame(self.results)
-            excel_filename = f"parser_results_{timestamp}.xlsx"
-            df.to_excel(excel_filename, index=False)
-            print(f"✓ Results exported to: {excel_filename}")
+            path = write_typed_results(df, jsonl_path[:-len('.jsonl')])
         except Exception as e:
-            print(f"⚠ Could not export to Excel: {e}")
+            print(f"⚠ Could not build typed results: {e}")
+            return
+        print(f"✓ Typed results exported to: {path}")
+        print_statistics(issuer_statistics(df))
 
 
 def main():
     import sys
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(
+        description="Parse every PDF statement in a directory and export the results")
+    arg_parser.add_argument('statements_dir', nargs='?', default='.')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help="number of worker processes (default: 1, serial)")
+    arg_parser.add_argument('--timeout', type=float, default=None,
+                            help="per-file timeout in seconds")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="always re-extract text instead of using the extraction cache")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                            help=f"extraction cache directory (default: {DEFAULT_CACHE_DIR})")
+    arg_parser.add_argument('--cache-size-mb', type=int,
+                            default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                            help="extraction cache size cap; least recently used entries are evicted")
+    arg_parser.add_argument('--format', default='jsonl',
+                            help=f"comma-separated streaming outputs: {', '.join(SINK_TYPES)} "
+                                 "(jsonl is always written)")
+    arg_parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="rows per CSV write / Parquet row group")
+    arg_parser.add_argument('--no-excel', action='store_true',
+                            help="skip building the .xlsx report from the JSONL stream")
+    arg_parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH,
+                            help=f"checkpoint manifest path (default: {DEFAULT_CHECKPOINT_PATH})")
+    arg_parser.add_argument('--resume', action='store_true',
+                            help="skip files the checkpoint marks as done and append to that run's output")
+    arg_parser.add_argument('--profile', type=int, default=0, metavar='N',
+                            help="time each parse phase and report the N slowest files and patterns")
+    arg_parser.add_argument('--watch', action='store_true',
+                            help="after the initial pass, keep parsing PDFs as they are added or "
+                                 "changed, appending to the same results (implies --resume)")
+    arg_parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="seconds between directory checks in --watch mode")
+    arg_parser.add_argument('--polling', action='store_true',
+                            help="watch by polling mtime/size even where inotify is available")
+    arg_parser.add_argument('--no-dedupe', action='store_true',
+                            help="parse every file even if it duplicates an earlier one")
+    arg_parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, default=None,
+                            metavar='DB',
+                            help="also upsert results into a SQLite store, keyed by content "
+                                 f"hash (default path: {DEFAULT_STORE_PATH})")
+    arg_parser.add_argument('--queue', metavar='DB',
+                            help="shared shard queue (SQLite on shared storage). Alone, it "
+                                 "partitions the PDFs into shards; see --worker and --merge")
+    arg_parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                            help="PDFs per shard when creating the queue")
+    arg_parser.add_argument('--worker', action='store_true',
+                            help="claim and parse shards from --queue until none are left")
+    arg_parser.add_argument('--worker-id', help="name for this worker's leases "
+                                                "(default: hostname-pid)")
+    arg_parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS,
+                            help="seconds without a renewal before a shard is handed to "
+                                 "another worker")
+    arg_parser.add_argument('--merge', action='store_true',
+                            help="combine the finished shards' results into one run and summary")
+    arg_parser.add_argument('--normalize', action='store_true',
+                            help="also write a typed table (dates, floats, categories) and "
+                                 "per-issuer statistics")
+    arg_parser.add_argument('--pattern-stats', nargs='?', const=DEFAULT_STATS_PATH, default=None,
+                            metavar='PATH',
+                            help="record per-pattern hit counts on one document in "
+                                 f"{DEFAULT_SAMPLE_EVERY} (default file: {DEFAULT_STATS_PATH})")
+    arg_parser.add_argument('--record-all-patterns', action='store_true',
+                            help="record every document instead of a sample; searches every "
+                                 "alternative of every field, so parsing is slower")
+    arg_parser.add_argument('--adaptive-patterns', action='store_true',
+                            help="try each field's likeliest pattern first instead of registry "
+                                 "order; can change which pattern wins, and so the output")
+    arg_parser.add_argument('--page-workers', type=int, default=0,
+                            help="split each large statement's pages across this many "
+                                 "processes (for a few long documents; keep --workers at 1)")
+    arg_parser.add_argument('--memory-limit-mb', type=float, default=None,
+                            help="per-document memory ceiling; past it extraction drops "
+                                 "layout analysis, then stops")
+    arg_parser.add_argument('--no-fast-path', action='store_true',
+                            help="always extract with pdfplumber instead of trying PyPDF2 first")
+    args = arg_parser.parse_args()
     
-    statements_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    statements_dir = args.statements_dir
     
     if not os.path.isdir(statements_dir):
         print(f"Error: Directory '{statements_dir}' not found")
         sys.exit(1)
     
-    tester = BatchTester(statements_dir)
-    tester.test_all_statements()
+    if args.workers < 1:
+        print("Error: --workers must be at least 1")
+        sys.exit(1)
+    
+    cache = None
+    if not args.no_cache:
+        cache = ExtractionCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+    
+    pattern_stats = None
+    if args.pattern_stats or args.record_all_patterns or args.adaptive_patterns:
+        pattern_stats = PatternStats(args.pattern_stats or DEFAULT_STATS_PATH,
+                                     adaptive=args.adaptive_patterns,
+                                     sample_every=1 if args.record_all_patterns else DEFAULT_SAMPLE_EVERY)
+    
+    formats = tuple(fmt.strip() for fmt in args.format.split(',') if fmt.strip())
+    unknown = [fmt for fmt in formats if fmt not in SINK_TYPES]
+    if unknown:
+        print(f"Error: Unknown output format(s): {', '.join(unknown)}")
+        sys.exit(1)
+    
+    tester = BatchTester(statements_dir, workers=args.workers, timeout=args.timeout,
+                         cache=cache, formats=formats, excel=not args.no_excel,
+                         chunk_size=args.chunk_size,
+                         checkpoint_path=args.checkpoint, resume=args.resume or args.watch,
+                         profile_top=args.profile, fast_path=not args.no_fast_path,
+                         dedupe=not args.no_dedupe, memory_limit_mb=args.memory_limit_mb,
+                         normalize=args.normalize, page_workers=args.page_workers,
+                         pattern_stats=pattern_stats, store_path=args.store)
+    try:
+        if args.queue:
+            _run_sharded(tester, args)
+        else:
+            tester.test_all_statements(watch=args.watch, poll_interval=args.poll_interval,
+                                       polling=args.polling)
+    except (ImportError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def _run_sharded(tester: BatchTester, args):
+    queue = ShardQueue(args.queue, lease_seconds=args.lease_seconds)
+    try:
+        if args.worker:
+            tester.run_worker(queue, args.worker_id or default_worker_id(), args.poll_interval)
+        elif args.merge:
+            tester.merge_shards(queue)
+        else:
+            tester.create_shards(queue, args.shard_size)
+    finally:
+        queue.close()
 
 
 if __name__ == "__main__":
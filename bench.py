@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from parser import CreditCardParser, FAST_BACKEND, LAYOUT_BACKEND, REGION_BACKENDS
+from page_text import PageTextProvider
+from issuers import ISSUERS, extract_fields
+
+
+DEFAULT_THRESHOLD = 0.2
+# Sub-millisecond regex phases are too noisy to flag on ratio alone
+DEFAULT_MIN_DELTA = 0.001
+
+# Entry points must import without these; they load when a parse needs them
+STARTUP_MODULES = ['parser', 'batch_test', 'service', 'async_api', 'debug_pdf']
+HEAVY_MODULES = {'pdfplumber', 'PyPDF2', 'pandas', 'numpy', 'pyarrow',
+                 'concurrent.futures.process'}
+DEFAULT_STARTUP_TARGET_MS = 200.0
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def build_scaled_copies(pdf_paths: list, page_counts: list, out_dir: str) -> list:
+    from PyPDF2 import PdfReader, PdfWriter
+
+    scaled = []
+    for pdf_path in pdf_paths:
+        reader = PdfReader(pdf_path)
+        source_pages = len(reader.pages)
+        base = os.path.splitext(os.path.basename(pdf_path))[0]
+        for page_count in page_counts:
+            writer = PdfWriter()
+            for i in range(page_count):
+                writer.add_page(reader.pages[i % source_pages])
+            out_path = os.path.join(out_dir, f"{base}_x{page_count}.pdf")
+            with open(out_path, 'wb') as f:
+                writer.write(f)
+            scaled.append(out_path)
+    return scaled
+
+
+def measure_startup(module: str, repeat: int = 3) -> dict:
+    # Fresh interpreter per run, timed with -X importtime; best of ``repeat``
+    # since a cold disk cache inflates the first one
+    best = None
+    heavy = set()
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True)
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line.split('|')
+            name = name.strip()
+            if name in HEAVY_MODULES:
+                heavy.add(name)
+            if name == module:
+                micros = int(cumulative)
+                best = micros if best is None else min(best, micros)
+    return {'module': module, 'import_ms': (best or 0) / 1000, 'heavy': sorted(heavy)}
+
+
+def check_startup(startup: list, target_ms: float) -> list:
+    failures = []
+    for result in startup:
+        if result['heavy']:
+            failures.append(f"{result['module']} imports {', '.join(result['heavy'])} at startup")
+        if result['import_ms'] > target_ms:
+            failures.append(f"{result['module']} imports in {result['import_ms']:.1f}ms "
+                            f"(target {target_ms:.0f}ms)")
+    return failures
+
+
+def _time(func, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_file(pdf_path: str, repeat: int) -> dict:
+    phases = {}
+
+    phases['extract_text_fast'] = _time(PageTextProvider(pdf_path, FAST_BACKEND).full_text)
+    pages = PageTextProvider(pdf_path, LAYOUT_BACKEND)
+    phases['extract_text'] = _time(pages.full_text)
+
+    start = time.perf_counter()
+    parser = CreditCardParser(pdf_path)
+    parser.parse()
+    phases['end_to_end'] = time.perf_counter() - start
+    backend = parser.backend
+    if parser.issuer in REGION_BACKENDS:
+        regions = PageTextProvider(pdf_path, REGION_BACKENDS[parser.issuer])
+        phases['extract_text_regions'] = _time(regions.full_text)
+
+    # Regex phases run against the full document text so a pattern that only
+    # blows up on long or non-matching statements still shows here
+    parser.pages = pages
+    phases['detect_issuer'] = _time(parser._detect_issuer, repeat)
+    text = pages.text()
+    for code, spec in ISSUERS.items():
+        phases[f'parse_{code}'] = _time(lambda: extract_fields(spec, text), repeat)
+
+    return {
+        'file': os.path.basename(pdf_path),
+        'bytes': os.path.getsize(pdf_path),
+        'pages': pages.page_count,
+        'issuer': parser.issuer,
+        'backend': backend,
+        'phases': phases,
+    }
+
+
+def run_benchmark(pdf_paths: list, repeat: int) -> dict:
+    files = []
+    totals = {}
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        result = bench_file(pdf_path, repeat)
+        files.append(result)
+        for phase, seconds in result['phases'].items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+    elapsed = time.perf_counter() - start
+
+    end_to_end = totals.get('end_to_end', 0.0)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'files': files,
+        'totals': totals,
+        'files_per_sec': len(files) / end_to_end if end_to_end else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'elapsed': elapsed,
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, threshold: float,
+                        min_delta: float = DEFAULT_MIN_DELTA) -> list:
+    regressions = []
+    # Compared per file so runs over different corpora stay comparable
+    baseline_files = {result['file']: result for result in baseline.get('files', [])}
+    for result in report['files']:
+        before_phases = baseline_files.get(result['file'], {}).get('phases', {})
+        for phase, seconds in result['phases'].items():
+            before = before_phases.get(phase)
+            if not before:
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > min_delta:
+                regressions.append(f"{result['file']} {phase}: {before:.4f}s -> {seconds:.4f}s "
+                                   f"(+{(seconds / before - 1) * 100:.1f}%)")
+
+    before = baseline.get('files_per_sec')
+    after = report['files_per_sec']
+    if before and after < before / (1 + threshold):
+        regressions.append(f"files_per_sec: {before:.2f} -> {after:.2f}")
+
+    before = baseline.get('peak_rss_mb')
+    after = report['peak_rss_mb']
+    if before and after > before * (1 + threshold):
+        regressions.append(f"peak_rss_mb: {before:.1f} -> {after:.1f}")
+    return regressions
+
+
+def print_report(report: dict):
+    print("=" * 70)
+    print("CREDIT CARD STATEMENT PARSER - BENCHMARK")
+    print("=" * 70)
+    if report.get('startup'):
+        print("\nStartup (import time):")
+        for result in report['startup']:
+            heavy = f"  (loads {', '.join(result['heavy'])})" if result['heavy'] else ""
+            print(f"  {result['module']:12}: {result['import_ms']:.1f}ms{heavy}")
+    if not report['files']:
+        return
+    for result in report['files']:
+        phases = result['phases']
+        print(f"\n{result['file']} ({result['pages']} pages, {result['issuer']}, {result['backend']})")
+        print(f"  extract_text: {phases['extract_text']:.4f}s  "
+              f"extract_text_fast: {phases['extract_text_fast']:.4f}s  "
+              f"detect_issuer: {phases['detect_issuer'] * 1000:.3f}ms  "
+              f"end_to_end: {phases['end_to_end']:.4f}s")
+        if 'extract_text_regions' in phases:
+            print(f"  extract_text_regions: {phases['extract_text_regions']:.4f}s")
+        parse_times = "  ".join(f"{phase[len('parse_'):]}: {seconds * 1000:.3f}ms"
+                                for phase, seconds in phases.items()
+                                if phase.startswith('parse_'))
+        print(f"  {parse_times}")
+
+    print("\n" + "-" * 70)
+    for phase, seconds in report['totals'].items():
+        print(f"{phase:20}: {seconds:.4f}s")
+    print(f"{'files/sec':20}: {report['files_per_sec']:.2f}")
+    print(f"{'peak RSS':20}: {report['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the parser over the bundled statements and scaled copies")
+    arg_parser.add_argument('statements_dir', nargs='?', default='statements')
+    arg_parser.add_argument('--scale', default='50',
+                            help="comma-separated page counts for synthetic copies ('' to disable)")
+    arg_parser.add_argument('--repeat', type=int, default=5,
+                            help="repetitions for the regex phases")
+    arg_parser.add_argument('--output', default='bench_output.json',
+                            help="where to write the JSON report")
+    arg_parser.add_argument('--baseline', help="previous JSON report to compare against")
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help="allowed slowdown before a phase counts as a regression (0.2 = 20%%)")
+    arg_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                            help="ignore slowdowns smaller than this many seconds")
+    arg_parser.add_argument('--startup-target-ms', type=float, default=DEFAULT_STARTUP_TARGET_MS,
+                            help="fail if an entry point takes longer than this to import")
+    arg_parser.add_argument('--startup-only', action='store_true',
+                            help="only check entry-point import time, skip the parse benchmark")
+    args = arg_parser.parse_args()
+
+    pdf_paths = sorted(os.path.join(args.statements_dir, f)
+                       for f in os.listdir(args.statements_dir)
+                       if f.lower().endswith('.pdf'))
+    if not pdf_paths:
+        print(f"No PDF files found in {args.statements_dir}")
+        sys.exit(1)
+
+    startup = [measure_startup(module) for module in STARTUP_MODULES]
+    startup_failures = check_startup(startup, args.startup_target_ms)
+    if args.startup_only:
+        print_report({'startup': startup, 'files': []})
+        _exit_on_startup_failures(startup_failures)
+        return
+
+    page_counts = [int(count) for count in args.scale.split(',') if count.strip()]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        corpus = pdf_paths + build_scaled_copies(pdf_paths, page_counts, scratch)
+        report = run_benchmark(corpus, args.repeat)
+    report['startup'] = startup
+
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Benchmark report written to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.threshold * 100:.0f}% of {args.baseline}:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+        print(f"\n✓ No regressions beyond {args.threshold * 100:.0f}% of {args.baseline}")
+
+    _exit_on_startup_failures(startup_failures)
+
+
+def _exit_on_startup_failures(failures: list):
+    if failures:
+        print("\n❌ Startup check failed:")
+        for failure in failures:
+            print(f"  • {failure}")
+        sys.exit(1)
+    print("\n✓ Entry points import without heavy dependencies")
+
+
+if __name__ == "__main__":
+    main()
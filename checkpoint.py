@@ -0,0 +1,130 @@
+import os
+import json
+from typing import Optional
+from extraction_cache import file_sha256
+
+
+DEFAULT_CHECKPOINT_PATH = 'parser_checkpoint.jsonl'
+# Files recorded with any other status (errors, timeouts, dead workers) are
+# retried on resume
+DONE_STATUSES = ('SUCCESS', 'DUPLICATE')
+
+
+class CheckpointManifest:
+    # Append-only JSONL: one "run" record naming the output stream, then one
+    # record per finished file. On load the last record for a path wins.
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self.output_prefix = None
+        self.entries = {}
+        self._file = None
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a torn last line
+                    continue
+                if record.get('type') == 'run':
+                    self.output_prefix = record['output_prefix']
+                else:
+                    self.entries[record['path']] = record
+        return self.output_prefix is not None
+
+    def start(self, output_prefix: str, resume: bool = False):
+        self.output_prefix = output_prefix
+        if not resume:
+            self.close()
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self.entries = {}
+            self._append({'type': 'run', 'output_prefix': output_prefix})
+
+    def _append(self, record: dict):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def completed_entry(self, pdf_path: str) -> Optional[dict]:
+        entry = self.entries.get(os.path.abspath(pdf_path))
+        if entry is None or entry.get('status') not in DONE_STATUSES:
+            return None
+
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+
+        if stat.st_size != entry['size']:
+            return None
+        if stat.st_mtime == entry['mtime']:
+            return entry
+
+        # Touched but possibly unchanged (e.g. re-copied): fall back to content
+        if file_sha256(pdf_path) != entry['sha256']:
+            return None
+        entry = dict(entry, mtime=stat.st_mtime)
+        self._append(entry)
+        self.entries[entry['path']] = entry
+        return entry
+
+    def record(self, pdf_path: str, status: str, output_path: str, offset: int,
+               content_hash: Optional[str] = None):
+        try:
+            stat = os.stat(pdf_path)
+            content_hash = content_hash or file_sha256(pdf_path)
+        except OSError:
+            return
+
+        entry = {
+            'path': os.path.abspath(pdf_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': content_hash,
+            'status': status,
+            'output': output_path,
+            'offset': offset,
+        }
+        self._append(entry)
+        self.entries[entry['path']] = entry
+
+    def trim_output(self, output_path: str):
+        # Cuts the results stream back to the end of the last record this
+        # manifest points at, before a resumed run appends to it: a crash can
+        # leave a torn last line, or records that were never checkpointed
+        # (those files are parsed again anyway)
+        offsets = [entry['offset'] for entry in self.entries.values()
+                   if entry['output'] == output_path]
+        try:
+            end = 0
+            if offsets:
+                with open(output_path, 'rb') as f:
+                    f.seek(max(offsets))
+                    end = f.tell() + len(f.readline())
+            if os.path.getsize(output_path) > end:
+                os.truncate(output_path, end)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_record_at(output_path: str, offset: int) -> Optional[dict]:
+    try:
+        with open(output_path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
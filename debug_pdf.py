@@ -1,18 +1,20 @@
-import pdfplumber
 import re
 import sys
+from parser import CreditCardParser
+from extraction_cache import ExtractionCache
 
 
-def debug_pdf(pdf_path):
+def debug_pdf(pdf_path, use_cache=True):
     
     print("="*80)
     print(f"DEBUGGING: {pdf_path}")
     print("="*80)
     
-    with pdfplumber.open(pdf_path) as pdf:
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
+    # Same (cached) text the parser's regexes run against, for every page
+    # rather than only those a lazy parse would load
+    parser = CreditCardParser(pdf_path, cache=ExtractionCache() if use_cache else None,
+                              fast_path=False, lazy=False)
+    text = parser.text
     
     print("\n" + "="*80)
     print("EXTRACTED TEXT (First 2000 characters)")
@@ -102,10 +104,14 @@ def debug_pdf(pdf_path):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python quick_debug.py <pdf_file>")
+    args = sys.argv[1:]
+    use_cache = "--no-cache" not in args
+    args = [arg for arg in args if arg != "--no-cache"]
+    
+    if len(args) < 1:
+        print("Usage: python quick_debug.py <pdf_file> [--no-cache]")
         print("\nExample: python quick_debug.py statements/icici.pdf")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    debug_pdf(pdf_path)
\ No newline at end of file
+    pdf_path = args[0]
+    debug_pdf(pdf_path, use_cache=use_cache)
\ No newline at end of file
@@ -0,0 +1,86 @@
+import re
+import hashlib
+from typing import Dict, List, Optional, Set
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def statement_fingerprint(first_page_text: str, result: dict) -> Optional[str]:
+    # Re-exported or re-rendered copies differ in bytes but not in what they
+    # say: hash the first page with whitespace dropped (line breaks vary
+    # between renderers) together with the fields that identify a statement
+    if result.get('issuer') in (None, 'UNKNOWN') or not first_page_text:
+        return None
+
+    period = result.get('statement_period') or result.get('statement_date')
+    material = "\x1f".join([
+        result['issuer'],
+        str(result.get('card_last_4')),
+        str(period),
+        _WHITESPACE_RE.sub('', first_page_text).lower(),
+    ])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class DuplicateIndex:
+    # First file seen with a given content hash or fingerprint is canonical;
+    # later ones point at it
+
+    def __init__(self):
+        self.by_hash: Dict[str, str] = {}
+        self.by_fingerprint: Dict[str, str] = {}
+        # Files found to be duplicates after others already pointed at them
+        self.aliases: Dict[str, str] = {}
+        # Canonical filename -> the files recorded as its duplicates
+        self.members: Dict[str, Set[str]] = {}
+
+    def claim_hash(self, content_hash: str, filename: str) -> Optional[str]:
+        # Returns the canonical filename, or None if ``filename`` now is it
+        canonical = self.by_hash.setdefault(content_hash, filename)
+        return canonical if canonical != filename else None
+
+    def claim_fingerprint(self, fingerprint: str, filename: str) -> Optional[str]:
+        canonical = self.by_fingerprint.setdefault(fingerprint, filename)
+        return canonical if canonical != filename else None
+
+    def add_member(self, filename: str, canonical: str):
+        self.members.setdefault(canonical, set()).add(filename)
+
+    def redirect(self, filename: str, canonical: str):
+        # ``filename`` turned out to be a duplicate itself
+        self.aliases[filename] = canonical
+        self.members.setdefault(canonical, set()).update(self.members.pop(filename, ()))
+        for index in (self.by_hash, self.by_fingerprint):
+            for key, owner in index.items():
+                if owner == filename:
+                    index[key] = canonical
+
+    def resolve(self, filename: str) -> str:
+        while filename in self.aliases:
+            filename = self.aliases[filename]
+        return filename
+
+    def forget(self, filename: str) -> List[str]:
+        # The file changed, so it no longer stands for its old content.
+        # Returns the files recorded as its duplicates, which now point at
+        # nothing and have to be parsed again.
+        for index in (self.by_hash, self.by_fingerprint):
+            for key in [key for key, canonical in index.items() if canonical == filename]:
+                del index[key]
+        self.aliases.pop(filename, None)
+        for members in self.members.values():
+            members.discard(filename)
+        orphans = sorted(self.members.pop(filename, ()))
+        for orphan in orphans:
+            self.aliases.pop(orphan, None)
+        return orphans
+
+
+def duplicate_result(filename: str, canonical: str, match: str) -> dict:
+    return {
+        'filename': filename,
+        'status': 'DUPLICATE',
+        'duplicate_of': canonical,
+        'duplicate_match': match,
+    }
@@ -0,0 +1,153 @@
+from functools import lru_cache
+from pdf_source import PdfSource
+
+
+@lru_cache(maxsize=None)
+def _package_version(name: str) -> str:
+    # Read from package metadata so a cache hit never imports the library
+    from importlib import metadata
+
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return __import__(name).__version__
+
+
+def _layout_chars(objects, char_type, container_type):
+    # Characters in content-stream order, including those inside figures
+    for obj in objects:
+        if isinstance(obj, container_type):
+            yield from _layout_chars(obj, char_type, container_type)
+        elif isinstance(obj, char_type):
+            yield obj
+
+
+class PdfplumberBackend:
+    # Full character/layout analysis; the text every issuer's patterns were
+    # written against
+
+    name = 'pdfplumber'
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+
+    def cache_settings(self) -> dict:
+        return dict(self.settings, pdfplumber=_package_version('pdfplumber'))
+
+    def open(self, source: PdfSource):
+        import pdfplumber
+
+        return pdfplumber.open(source.stream())
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        page = document.pages[index]
+        try:
+            return page.extract_text(**self.settings) or ""
+        finally:
+            self._release(page)
+
+    def region_text(self, document, index: int, regions) -> str:
+        # Text of the characters inside each region (x0, top, x1, bottom, as
+        # fractions of the page size). The content stream is still interpreted
+        # in full, but only the characters kept are converted and laid out.
+        from pdfminer.layout import LTChar, LTContainer
+        from pdfplumber.utils import extract_text
+
+        page = document.pages[index]
+        try:
+            boxes = [(x0 * page.width, top * page.height, x1 * page.width, bottom * page.height)
+                     for x0, top, x1, bottom in regions]
+            kept = [[] for _ in boxes]
+            for obj in _layout_chars(page.layout, LTChar, LTContainer):
+                x = (obj.x0 + obj.x1) / 2
+                y = page.height - (obj.y0 + obj.y1) / 2
+                for box, chars in zip(boxes, kept):
+                    if box[0] <= x <= box[2] and box[1] <= y <= box[3]:
+                        chars.append(page.process_object(obj))
+                        break
+            return "\n".join(extract_text(chars, **self.settings) for chars in kept if chars)
+        finally:
+            self._release(page)
+
+    def _release(self, page):
+        # pdfplumber keeps every page's layout objects and text map alive
+        # with the document; drop them once the text is taken
+        if hasattr(page, 'close'):
+            page.close()
+        else:
+            page.flush_cache()
+            if hasattr(page.get_textmap, 'cache_clear'):
+                page.get_textmap.cache_clear()
+
+    def close(self, document):
+        document.close()
+
+
+class RegionBackend:
+    # Layout text of an issuer's template regions, (page, x0, top, x1,
+    # bottom) each; a cheap first try that the parser drops for the full
+    # layout text when a field is not found in it. Pages past the last
+    # region are never read.
+
+    name = 'pdfplumber-regions'
+
+    def __init__(self, layout: PdfplumberBackend, regions):
+        self.layout = layout
+        self.regions = regions
+
+    def cache_settings(self) -> dict:
+        return dict(self.layout.cache_settings(), regions=[list(region) for region in self.regions])
+
+    def open(self, source: PdfSource):
+        return self.layout.open(source)
+
+    def page_count(self, document) -> int:
+        last_page = max(region[0] for region in self.regions)
+        return min(last_page + 1, self.layout.page_count(document))
+
+    def page_text(self, document, index: int) -> str:
+        boxes = [region[1:] for region in self.regions if region[0] == index]
+        if not boxes:
+            return ""
+        return self.layout.region_text(document, index, boxes)
+
+    def close(self, document):
+        self.layout.close(document)
+
+
+class PyPDF2Backend:
+    # Raw content-stream text: several times cheaper than pdfplumber, but
+    # line breaks and column order differ, so only issuers marked fast_path
+    # in the registry are parsed from it
+
+    name = 'pypdf2'
+
+    def cache_settings(self) -> dict:
+        return {"backend": self.name, "PyPDF2": _package_version('PyPDF2')}
+
+    def open(self, source: PdfSource):
+        from PyPDF2 import PdfReader
+
+        return PdfReader(source.stream())
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+    def has_composite_font(self, document, index: int) -> bool:
+        # extract_text expands a Type0 font's ToUnicode ranges one character
+        # at a time, which makes such a page about as slow as pdfplumber
+        resources = document.pages[index].get('/Resources')
+        fonts = resources.get_object().get('/Font') if resources is not None else None
+        if fonts is None:
+            return False
+        return any(font.get_object().get('/Subtype') == '/Type0'
+                   for font in fonts.get_object().values())
+
+    def close(self, document):
+        pass
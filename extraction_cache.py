@@ -0,0 +1,206 @@
+import os
+import json
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
+
+
+# Bump whenever the shape or normalization of cached text changes so stale
+# entries written by older code are never served.
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'CC_PARSER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'credit_card_parser')
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_sha256(pdf_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    # Serializes a read-modify-write of a file shared by batch workers
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(lock_path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class ExtractionCache:
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES, version_key: str = ""):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version_key = version_key
+        # Running total of entry sizes, shared by every process using the
+        # directory, so it is only walked when this file is missing or
+        # entries have to be evicted
+        self._usage_path = os.path.join(cache_dir, 'usage')
+
+    def key_for(self, content_hash: str, settings: dict) -> str:
+        material = json.dumps({
+            'version': CACHE_VERSION,
+            'version_key': self.version_key,
+            'settings': settings,
+            'content': content_hash,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # An entry may be rewritten with more pages
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+
+        # Write-then-rename so concurrent workers never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠ Could not write extraction cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        try:
+            self._add_usage(os.path.getsize(path) - previous_size)
+        except OSError as e:
+            print(f"⚠ Could not update extraction cache usage: {e}")
+
+    def _add_usage(self, delta: int):
+        with file_lock(self._usage_path + '.lock'):
+            usage = self._read_usage()
+            # A scan already includes the entry just written
+            usage = self._scan_usage() if usage is None else usage + delta
+            if usage > self.max_bytes:
+                usage = self._evict()
+            self._write_usage(usage)
+
+    def _read_usage(self) -> Optional[int]:
+        try:
+            with open(self._usage_path, 'r', encoding='utf-8') as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_usage(self, usage: int):
+        with open(self._usage_path, 'w', encoding='utf-8') as f:
+            f.write(str(usage))
+
+    def _entries(self) -> list:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        # Recounted from the directory, which also corrects any drift in the
+        # running total
+        entries = sorted(self._entries())
+        usage = sum(size for _, size, _ in entries)
+        # Evict down to 90% of the cap so we don't rescan on every put
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if usage <= target:
+                break
+            try:
+                os.remove(path)
+                usage -= size
+            except OSError:
+                pass
+        return usage
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            'cache_dir': self.cache_dir,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        try:
+            with file_lock(self._usage_path + '.lock'):
+                self._write_usage(0)
+        except OSError:
+            pass
+
+
+def main():
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'clear'):
+        print("Usage: python extraction_cache.py <stats|clear> [cache_dir]")
+        sys.exit(1)
+
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CACHE_DIR
+    cache = ExtractionCache(cache_dir)
+
+    if sys.argv[1] == 'clear':
+        cache.clear()
+        print(f"✓ Cleared extraction cache: {cache_dir}")
+    else:
+        for key, value in cache.stats().items():
+            print(f"{key:12}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import heapq
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    # Elsewhere only the peak is available, which is still a safe upper bound
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ParseTimings:
+    # Passed to CreditCardParser as ``timings``; every hook site checks for
+    # None first, so an uninstrumented parse pays one comparison per call.
+
+    def __init__(self):
+        self.phases: Dict[str, List[float]] = {}
+        self.pages: List[Tuple[int, float, float]] = []
+        self.patterns: Dict[Tuple[str, str, int], List[float]] = {}
+        self.matched: Dict[Tuple[str, str], int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_phase(self, name: str, wall: float, cpu: float):
+        totals = self.phases.setdefault(name, [0.0, 0.0, 0])
+        totals[0] += wall
+        totals[1] += cpu
+        totals[2] += 1
+
+    def add_page(self, index: int, wall: float, cpu: float):
+        self.pages.append((index, wall, cpu))
+        self.add_phase('extract_text', wall, cpu)
+
+    def add_pattern(self, issuer: str, field: str, index: int,
+                    wall: float, cpu: float, matched: bool):
+        totals = self.patterns.setdefault((issuer, field, index), [0.0, 0.0, 0, 0])
+        totals[0] += wall
+        totals[1] += cpu
+        totals[2] += 1
+        if matched:
+            totals[3] += 1
+            self.matched[(issuer, field)] = index
+
+    @property
+    def total_wall(self) -> float:
+        if 'total' in self.phases:
+            return self.phases['total'][0]
+        return sum(wall for wall, _, _ in self.phases.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'phases': {name: {'wall': wall, 'cpu': cpu, 'calls': calls}
+                       for name, (wall, cpu, calls) in self.phases.items()},
+            'pages': [{'page': index, 'wall': wall, 'cpu': cpu}
+                      for index, wall, cpu in self.pages],
+            'patterns': [{'issuer': issuer, 'field': field, 'index': index,
+                          'wall': wall, 'cpu': cpu, 'calls': calls, 'matches': matches}
+                         for (issuer, field, index), (wall, cpu, calls, matches)
+                         in self.patterns.items()],
+            'matched': {f"{issuer}.{field}": index
+                        for (issuer, field), index in self.matched.items()},
+        }
+
+
+class ProfileReport:
+    # Aggregates ParseTimings.to_dict() output across a batch
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self._slowest_files = []
+        self.patterns: Dict[Tuple[str, str, int], List[float]] = {}
+        self.phases: Dict[str, float] = {}
+
+    def add(self, filename: str, timings: dict):
+        phases = timings['phases']
+        total = phases.get('total', {}).get('wall', 0.0)
+        entry = (total, filename, {name: phase['wall'] for name, phase in phases.items()})
+        if len(self._slowest_files) < self.top_n:
+            heapq.heappush(self._slowest_files, entry)
+        else:
+            heapq.heappushpop(self._slowest_files, entry)
+
+        for name, phase in phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + phase['wall']
+
+        for pattern in timings['patterns']:
+            key = (pattern['issuer'], pattern['field'], pattern['index'])
+            totals = self.patterns.setdefault(key, [0.0, 0, 0])
+            totals[0] += pattern['wall']
+            totals[1] += pattern['calls']
+            totals[2] += pattern['matches']
+
+    def slowest_files(self) -> list:
+        return sorted(self._slowest_files, reverse=True)
+
+    def slowest_patterns(self) -> list:
+        ranked = sorted(self.patterns.items(), key=lambda item: item[1][0], reverse=True)
+        return ranked[:self.top_n]
+
+    def print_report(self):
+        print("\n" + "=" * 70)
+        print(f"PROFILE (top {self.top_n})")
+        print("=" * 70)
+
+        print("\nTime by Phase:")
+        for name, wall in sorted(self.phases.items(), key=lambda item: item[1], reverse=True):
+            print(f"  • {name}: {wall:.3f}s")
+
+        print("\nSlowest Files:")
+        for total, filename, phases in self.slowest_files():
+            breakdown = ", ".join(f"{name} {wall:.3f}s" for name, wall in phases.items()
+                                  if name != 'total')
+            print(f"  • {filename}: {total:.3f}s ({breakdown})")
+
+        print("\nSlowest Patterns:")
+        for (issuer, field, index), (wall, calls, matches) in self.slowest_patterns():
+            print(f"  • {issuer}.{field}[{index}]: {wall * 1000:.2f}ms "
+                  f"over {calls} search(es), {matches} match(es)")
@@ -0,0 +1,393 @@
+import re
+import time
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Callable, Collection, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from transactions import Transaction
+
+
+# Seconds a single field pattern may run before it is reported (and, where
+# SIGALRM is usable, interrupted) as a blow-up
+PATTERN_TIME_BUDGET = 0.5
+
+
+def _text(match: re.Match, group: int) -> str:
+    return match.group(group)
+
+
+def _amount(match: re.Match, group: int) -> float:
+    return float(match.group(group).replace(',', ''))
+
+
+def _period(match: re.Match, group: int) -> str:
+    return f"{match.group(group)} - {match.group(group + 1)}"
+
+
+class FieldPattern(NamedTuple):
+    regex: re.Pattern
+    group: int
+    # When set, the pattern is only tried where ``anchor`` matches, and may
+    # not run more than ``window`` characters past it
+    anchor: Optional[re.Pattern] = None
+    window: Optional[int] = None
+
+
+class FieldSpec(NamedTuple):
+    name: str
+    convert: Callable
+    patterns: List[FieldPattern]
+
+
+class IssuerSpec(NamedTuple):
+    code: str
+    display_name: str
+    keywords: List[Tuple[str, float]]
+    fields: List[FieldSpec]
+    # One transaction per line, with named groups date, description, amount
+    # and optionally drcr, plus wrapped for a description printed on the
+    # line above the row
+    transaction_pattern: Optional[re.Pattern] = None
+    # Fields verified to parse identically from the raw PyPDF2 text, so the
+    # slower pdfplumber layout pass is skipped unless one comes back None
+    fast_path: bool = False
+    # Date order of the statement's dates; Chase prints MM/DD/YY
+    day_first: bool = True
+    # Layout template: (page, x0, top, x1, bottom) boxes, as fractions of the
+    # page size, that hold every field. Their text is parsed first, and the
+    # full layout text only when a field is missing from it.
+    regions: Tuple[Tuple[int, float, float, float, float], ...] = ()
+
+
+def _transactions(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags | re.MULTILINE)
+
+
+def _field(name: str, convert: Callable, patterns: list, flags: int = 0) -> FieldSpec:
+    # Each pattern is (regex, group) or (regex, group, anchor, window)
+    compiled = []
+    for pattern, group, *bounds in patterns:
+        if bounds:
+            anchor, window = bounds
+            compiled.append(FieldPattern(re.compile(pattern, flags), group,
+                                         re.compile(anchor, flags & re.IGNORECASE), window))
+        else:
+            compiled.append(FieldPattern(re.compile(pattern, flags), group))
+    return FieldSpec(name, convert, compiled)
+
+
+_HDFC_DUE_TABLE = r'Payment Due Date\s+Total Dues\s+Minimum Amount Due.*?(\d{2}/\d{2}/\d{4})\s+([\d,]+\.\d{2})'
+
+
+# Fields are tried in order; within a field the first pattern that matches wins.
+# Patterns of a field are alternatives for layout variants, so a PatternStats
+# may try them in a different order.
+# Compiled once at import time and shared by every parser instance.
+ISSUERS: Dict[str, IssuerSpec] = {
+    "HDFC": IssuerSpec("HDFC", "HDFC Bank", [("hdfc bank", 1.0), ("hdfcbank", 1.0)], [
+        _field("statement_date", _text, [
+            (r'Statement Date:\s*(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("due_date", _text, [
+            (_HDFC_DUE_TABLE, 1, r'Payment Due Date', 500),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("total_amount_due", _amount, [
+            (_HDFC_DUE_TABLE, 2, r'Payment Due Date', 500),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("card_last_4", _text, [
+            (r'Card No:\s*\d{4}\s+\d{2}XX\s+XXXX\s+(\d{4})', 1),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("credit_limit", _amount, [
+            (r'Credit Limit\s+Available Credit Limit\s+Available Cash Limit.*?([\d,]+)', 1,
+             r'Credit Limit', 500),
+        ], re.IGNORECASE | re.DOTALL),
+    ], _transactions(
+        r'^(?P<date>\d{2}/\d{2}/\d{4})\s+(?P<description>.*?[A-Za-z].*?)\s+(?P<amount>[\d,]+\.\d{2})(?:\s+(?P<drcr>Cr))?\s*$',
+        re.IGNORECASE
+    ), regions=(
+        (0, 0.0, 0.05, 1.0, 0.23),  # card number, statement date, due and credit limit tables
+    )),
+    "ICICI": IssuerSpec("ICICI", "ICICI Bank", [("icici bank", 1.0), ("icicibank", 1.0)], [
+        _field("statement_period", _period, [
+            (r'Statement Period\s*:?\s*From\s+(\d{2}/\d{2}/\d{4})\s+to\s+(\d{2}/\d{2}/\d{4})', 1),
+            (r'From\s+(\d{2}/\d{2}/\d{4})\s+to\s+(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("due_date", _text, [
+            (r'Due Date\s*:?\s*(\d{2}/\d{2}/\d{4})', 1),
+            (r'Payment Due Date\s*:?\s*(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("total_amount_due", _amount, [
+            (r'Your Total Amount Due\s*[\r\n]+\s*\d{2}/\d{2}/\d{4}\s*\|\s*[\d,]+\.?\d*\s*[\r\n]+\s*\|\s*([\d,]+\.?\d*)', 1),
+            (r'Minimum Amount Due\s+Your Total Amount Due\s*[\r\n]+\s*\d{2}/\d{2}/\d{4}\s*\|\s*[\d,]+\.?\d*\s*[\r\n]+\s*\|\s*([\d,]+\.?\d*)', 1),
+        ], re.IGNORECASE),
+        _field("card_last_4", _text, [
+            (r'Card Account No\s*[\r\n]+\s*\w+.*?\s+(\d{4})\s+XXXX\s+XXXX\s+(\d{4})', 2),
+            (r'(\d{4})\s+XXXX\s+XXXX\s+(\d{4})', 2),
+        ]),
+        _field("previous_balance", _amount, [
+            (r'Previous Balance.*?Summary\s+([\d,]+\.?\d*)', 1, r'Previous Balance', 500),
+            (r'Statement\s+Summary\s+([\d,]+\.?\d*)', 1),
+        ], re.IGNORECASE | re.DOTALL),
+    ], _transactions(
+        r'^(?:(?P<wrapped>(?!\d{2}/\d{2}/\d{4})[^\n]*[A-Za-z][^\n]*)\n)?'
+        r'(?P<date>\d{2}/\d{2}/\d{4})\s+(?:\d{15,}\s+)?(?P<description>[^|\n]*?)\s*(?:(?<!\S)-?\d+\s+)?'
+        r'(?P<amount>[\d,]+\.\d{2})(?:\s+(?P<drcr>CR))?\s*$'
+    )),
+    "IDFC_FIRST": IssuerSpec("IDFC_FIRST", "IDFC FIRST Bank",
+                              [("idfc first bank", 1.0), ("idfcfirstbank", 1.0), ("idfcbank", 1.0)], [
+        _field("statement_period", _period, [
+            (r'From:\s*(\d{2}/\d{2}/\d{4})\s*To:\s*(\d{2}/\d{2}/\d{4})', 1),
+            (r'Statement Period\s*From:\s*(\d{2}/\d{2}/\d{4})\s*To:\s*(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("due_date", _text, [
+            (r'Statement Date\s+Payment Due Date\s*[\r\n]+.*?(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})', 2,
+             r'Statement Date', 500),
+            (r'(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s*[\r\n]+.*?Nursing Home', 2,
+             r'\d{2}/\d{2}/\d{4}\s+\d{2}/\d{2}/\d{4}', 500),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("total_amount_due", _amount, [
+            (r'Total Amount Due\s+Minimum Amount Due\s*[\r\n]+.*?r\s*([\d,]+\.?\d*)', 1,
+             r'Total Amount Due', 500),
+            (r'Total Amount Due.*?r\s*([\d,]+\.?\d*)\s+r\s*[\d,]+\.?\d*', 1, r'Total Amount Due', 500),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("card_last_4", _text, [
+            (r'(\d{6})\*{6}(\d{4})', 2),
+            (r'Card Number\s*:?\s*\d{6}\*{6}(\d{4})', 1),
+        ]),
+        _field("previous_balance", _amount, [
+            (r'Opening\s+Balance\s+Purchase.*?r[\d,]+\.?\d*\s+r([\d,]+\.?\d*)', 1,
+             r'Opening\s+Balance', 500),
+            (r'SUMMARY\s+r[\d,]+\.?\d*\s+r([\d,]+\.?\d*)', 1),
+        ], re.IGNORECASE | re.DOTALL),
+    ], _transactions(
+        r'^(?P<date>\d{2}/\d{2}/\d{4})\s+(?P<description>.*?[A-Za-z].*?)\s+(?P<amount>[\d,]+\.\d{2})(?:\s+(?P<drcr>CR))?\s*$'
+    ), regions=(
+        (0, 0.0, 0.13, 1.0, 0.35),  # due date, total due and statement summary
+        (0, 0.0, 0.89, 1.0, 0.95),  # statement period
+        (1, 0.5, 0.09, 1.0, 0.14),  # card number, printed above the transactions
+    )),
+    "AXIS": IssuerSpec("AXIS", "Axis Bank", [("axis bank", 1.0), ("axisbank", 1.0)], [
+        _field("statement_period", _period, [
+            (r'(\d{2}/\d{2}/\d{4})\s*-\s*(\d{2}/\d{2}/\d{4})\s+\d{2}/\d{2}/\d{4}', 1),
+            (r'Statement Period\s*(\d{2}/\d{2}/\d{4})\s*-?\s*(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("due_date", _text, [
+            (r'\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4}\s+(\d{2}/\d{2}/\d{4})', 1),
+            (r'Payment Due Date\s*(\d{2}/\d{2}/\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("total_amount_due", _amount, [
+            (r'Total Payment Due\s+[\w\s]+\s+([\d,]+\.?\d*)\s+Dr', 1, r'Total Payment Due', 300),
+            (r'Total Payment Due.*?([\d,]+\.?\d*)\s+Dr', 1, r'Total Payment Due', 500),
+        ], re.IGNORECASE | re.DOTALL),
+        _field("card_last_4", _text, [
+            (r'(\d{8})\*{4}(\d{4})', 2),
+            (r'Card\s+No[:\.]?\s*(\d{8})\*{4}(\d{4})', 2),
+        ]),
+        _field("previous_balance", _amount, [
+            (r'Previous Balance\s*-\s*Payments.*?[\r\n]+\s*([\d,]+\.?\d*)\s+Dr', 1,
+             r'Previous Balance', 500),
+            (r'Account Summary.*?[\r\n]+.*?[\r\n]+\s*([\d,]+\.?\d*)\s+Dr\s+[\d,]+\.?\d*\s+Dr', 1,
+             r'Account Summary', 500),
+        ], re.IGNORECASE | re.DOTALL),
+    ], _transactions(
+        r'^(?P<date>\d{2}/\d{2}/\d{4})\s+(?P<description>.*?[A-Za-z].*?)\s+(?P<amount>[\d,]+\.\d{2})\s+(?P<drcr>Dr|Cr)\s+[\d,]+\.\d{2}\s+(?:Dr|Cr)\s*$',
+        re.IGNORECASE
+    ), fast_path=True, regions=(
+        (0, 0.0, 0.20, 1.0, 0.31),  # payment summary and account summary strips
+    )),
+    "CHASE": IssuerSpec("CHASE", "Chase", [("chase.com", 1.0)], [
+        _field("statement_period", _period, [
+            (r'Opening/Closing Date\s*(\d{2}/\d{2}/\d{2,4})\s*-\s*(\d{2}/\d{2}/\d{2,4})', 1),
+        ], re.IGNORECASE),
+        _field("due_date", _text, [
+            (r'Payment Due Date\s*:?\s*(\d{2}/\d{2}/\d{2,4})', 1),
+            (r'Payment Due Date\s*[\r\n]+\s*(\d{2}/\d{2}/\d{2,4})', 1),
+        ], re.IGNORECASE),
+        _field("total_amount_due", _amount, [
+            (r'New Balance\s*\$\s*([\d,]+\.?\d*)', 1),
+            (r'New Balance.*?\$\s*([\d,]+\.?\d*)', 1),
+        ], re.IGNORECASE),
+        _field("card_last_4", _text, [
+            (r'Account Number\s*:?\s*XXXX\s+XXXX\s+XXXX\s+(\d{4})', 1),
+            (r'Account number\s*:?\s*\d{4}\s+\d{4}\s+\d{4}\s+(\d{4})', 1),
+            (r'XXXX\s+XXXX\s+XXXX\s+(\d{4})', 1),
+        ], re.IGNORECASE),
+        _field("previous_balance", _amount, [
+            (r'Previous Balance\s*\$\s*([\d,]+\.?\d*)', 1),
+            (r'Previous Balance.*?\$\s*([\d,]+\.?\d*)', 1),
+        ], re.IGNORECASE),
+    ], _transactions(
+        r'^(?P<date>\d{2}/\d{2})\s+(?P<description>.*?[A-Za-z].*?)\s+(?P<amount>-?[\d,]+\.\d{2})\s*$'
+    ), day_first=False, regions=(
+        (0, 0.0, 0.05, 1.0, 0.38),  # account summary box
+        (0, 0.55, 0.77, 1.0, 0.84),  # payment coupon
+    )),
+}
+
+
+DETECTION_PREFIX_CHARS = 5000
+HEADER_CHARS = 1000
+
+_KEYWORD_OWNERS = {keyword: (spec.code, weight)
+                   for spec in ISSUERS.values() for keyword, weight in spec.keywords}
+# One alternation (longest keyword first) so detection is a single pass over
+# the text instead of one substring scan per keyword
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(_KEYWORD_OWNERS, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+
+def rank_issuers(text: str) -> List[Tuple[str, float]]:
+    scores = {}
+    first_seen = {}
+    for match in _KEYWORD_RE.finditer(text):
+        code, weight = _KEYWORD_OWNERS[match.group(0).lower()]
+        first_seen.setdefault(code, match.start())
+        # Bank names in the letterhead are a stronger signal than ones in
+        # the body (e.g. "pay via HDFC Bank NEFT" on an ICICI statement)
+        if match.start() < HEADER_CHARS:
+            weight *= 2
+        scores[code] = scores.get(code, 0.0) + weight
+
+    # Ties go to the bank named first
+    return sorted(scores.items(), key=lambda item: (-item[1], first_seen[item[0]]))
+
+
+class PatternBudgetExceeded(BaseException):
+    pass
+
+
+def _raise_budget_exceeded(signum, frame):
+    raise PatternBudgetExceeded()
+
+
+@contextmanager
+def _budget_guard(budget: Optional[float]):
+    # Yields True when a runaway search can be interrupted with SIGALRM: that
+    # needs Unix, the main thread, and no outer timer (such as batch_test's
+    # --timeout) already running. Otherwise blow-ups are only reported.
+    if (budget is None or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()
+            or signal.getitimer(signal.ITIMER_REAL)[0] > 0):
+        yield False
+        return
+
+    previous_handler = signal.signal(signal.SIGALRM, _raise_budget_exceeded)
+    try:
+        yield True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _search(pattern: FieldPattern, text: str) -> Optional[re.Match]:
+    if pattern.anchor is None:
+        return pattern.regex.search(text)
+
+    for anchor in pattern.anchor.finditer(text):
+        start = anchor.start()
+        match = pattern.regex.match(text, start, start + pattern.window)
+        if match:
+            return match
+    return None
+
+
+def extract_fields(spec: IssuerSpec, text: str, timings=None,
+                   blowups: Optional[list] = None,
+                   budget: Optional[float] = PATTERN_TIME_BUDGET,
+                   stats=None, outcome: Optional[dict] = None,
+                   only: Optional[Collection[str]] = None) -> Dict[str, any]:
+    # stats (a PatternStats) may reorder each field's patterns by hit rate;
+    # outcome collects the (index, matched) of every pattern tried per field.
+    # With only, just those fields are searched for and returned.
+    data = {"issuer": spec.display_name}
+    # Patterns shared between fields (e.g. HDFC's due table, read for its
+    # date and its amount) are searched once: keyed without the group
+    matches = {}
+
+    with _budget_guard(budget) as interruptible:
+        for field in spec.fields:
+            if only is not None and field.name not in only:
+                continue
+            data[field.name] = None
+            tried = None
+            if outcome is not None:
+                tried = outcome[field.name] = []
+            if stats is None:
+                order = range(len(field.patterns))
+            else:
+                order = stats.order(spec.code, field.name, len(field.patterns))
+            found = False
+            for index in order:
+                # While recording, the alternatives after the winner are
+                # still searched: a fallback's hit rate would otherwise only
+                # count documents its predecessors missed
+                if found and tried is None:
+                    break
+                pattern = field.patterns[index]
+                search = (pattern.regex, pattern.anchor, pattern.window)
+                if search not in matches:
+                    matches[search] = _timed_search(spec, field, index, pattern, text,
+                                                    timings, blowups, budget, interruptible)
+                match = matches[search]
+                if tried is not None:
+                    tried.append((index, match is not None))
+                if match and not found:
+                    data[field.name] = field.convert(match, pattern.group)
+                    found = True
+
+    return data
+
+
+def _timed_search(spec: IssuerSpec, field: FieldSpec, index: int, pattern: FieldPattern,
+                  text: str, timings, blowups: Optional[list],
+                  budget: Optional[float], interruptible: bool) -> Optional[re.Match]:
+    wall = time.perf_counter()
+    cpu = time.process_time() if timings is not None else 0.0
+    match = None
+    interrupted = False
+    try:
+        try:
+            if interruptible:
+                signal.setitimer(signal.ITIMER_REAL, budget)
+            match = _search(pattern, text)
+        finally:
+            if interruptible:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except PatternBudgetExceeded:
+        interrupted = True
+    elapsed = time.perf_counter() - wall
+
+    if timings is not None:
+        timings.add_pattern(spec.code, field.name, index, elapsed,
+                            time.process_time() - cpu, match is not None)
+
+    if budget is not None and (interrupted or elapsed > budget):
+        print(f"⚠ Pattern {spec.code}.{field.name}[{index}] took {elapsed:.2f}s"
+              f"{' and was interrupted' if interrupted else ''}")
+        if blowups is not None:
+            blowups.append({"issuer": spec.code, "field": field.name, "index": index,
+                            "seconds": round(elapsed, 3), "interrupted": interrupted})
+    return match
+
+
+def extract_transactions(spec: IssuerSpec, text: str) -> Iterator[Transaction]:
+    if spec.transaction_pattern is None:
+        return
+
+    for match in spec.transaction_pattern.finditer(text):
+        amount = float(match.group("amount").replace(',', ''))
+        drcr = match.groupdict().get("drcr")
+        # Chase prints credits as negative amounts instead of a CR suffix
+        if amount < 0:
+            amount, drcr = -amount, "CR"
+        description = match.group("description").strip()
+        if not description:
+            description = (match.groupdict().get("wrapped") or "").strip()
+        yield Transaction(
+            match.group("date"),
+            description,
+            amount,
+            "CR" if drcr and drcr.upper() == "CR" else "DR",
+        )
@@ -0,0 +1,171 @@
+from typing import Iterable
+from issuers import ISSUERS
+from result_sinks import FLOAT_COLUMNS, iter_jsonl
+from summary import (SummaryCounters, COMMON_FIELDS, OTHER_BANK_FIELDS, HDFC_FIELDS,
+                     print_summary)
+
+
+CATEGORY_COLUMNS = ['issuer', 'status']
+_DAY_FIRST = {spec.display_name: spec.day_first for spec in ISSUERS.values()}
+
+
+def load_results(jsonl_path: str):
+    import pandas as pd
+
+    df = pd.DataFrame(iter_jsonl(jsonl_path))
+    if 'filename' in df:
+        # --resume and --watch append a new record when a file is re-parsed
+        df = df.drop_duplicates('filename', keep='last').reset_index(drop=True)
+    return df
+
+
+def _parse_dates(values, day_first):
+    import pandas as pd
+
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    present = values.notna()
+    for order, formats in ((day_first, ('%d/%m/%Y', '%d/%m/%y')),
+                           (~day_first, ('%m/%d/%Y', '%m/%d/%y'))):
+        for fmt in formats:
+            rows = order & present & parsed.isna()
+            if rows.any():
+                parsed[rows] = pd.to_datetime(values[rows], format=fmt, errors='coerce')
+    return parsed
+
+
+def normalize(df):
+    # One pass per column over the whole table: typed dates (day/month order
+    # taken from the issuer registry), floats and categoricals
+    import pandas as pd
+
+    df = df.copy()
+    for column in ['issuer', 'status', 'statement_period', 'statement_date', 'due_date',
+                   'card_last_4', *FLOAT_COLUMNS]:
+        if column not in df:
+            df[column] = None
+
+    day_first = df['issuer'].map(_DAY_FIRST).fillna(True).astype(bool)
+
+    period = df['statement_period'].astype('string').str.extract(r'^\s*(\S+)\s*-\s*(\S+)\s*$')
+    df['period_start'] = _parse_dates(period[0], day_first)
+    df['period_end'] = _parse_dates(period[1], day_first)
+    df['statement_date'] = _parse_dates(df['statement_date'], day_first)
+    df['due_date'] = _parse_dates(df['due_date'], day_first)
+
+    for column in FLOAT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    df['card_last_4'] = df['card_last_4'].astype('string')
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+def summarize(df) -> SummaryCounters:
+    # Same counters the batch run keeps incrementally, computed column-wise
+    summary = SummaryCounters()
+    status = df['status'].astype(object)
+    summary.total = len(df)
+    summary.failed = int((status == 'ERROR').sum())
+    summary.duplicates = int((status == 'DUPLICATE').sum())
+
+    ok = df[status == 'SUCCESS']
+    summary.successful = len(ok)
+    issuers = ok['issuer'].astype(object).fillna('Unknown')
+    summary.issuers = {issuer: int(count) for issuer, count in issuers.value_counts(sort=False).items()}
+
+    is_hdfc = issuers == 'HDFC Bank'
+    summary.hdfc_successful = int(is_hdfc.sum())
+    groups = [(ok, 'All', COMMON_FIELDS), (ok[~is_hdfc], 'Others', OTHER_BANK_FIELDS),
+              (ok[is_hdfc], 'HDFC', HDFC_FIELDS)]
+    for rows, group, fields in groups:
+        present = rows.reindex(columns=fields).notna().sum()
+        for field in fields:
+            summary.extracted[(field, group)] = int(present[field])
+    return summary
+
+
+def issuer_statistics(df):
+    ok = df[df['status'].astype(object) == 'SUCCESS']
+    if ok.empty:
+        return ok
+    stats = ok.groupby('issuer', observed=True).agg(
+        statements=('filename', 'size'),
+        total_due=('total_amount_due', 'sum'),
+        mean_due=('total_amount_due', 'mean'),
+        first_due=('due_date', 'min'),
+        last_due=('due_date', 'max'),
+    )
+    return stats
+
+
+def print_statistics(stats):
+    if stats.empty:
+        return
+    print("\nStatistics by Issuer:")
+    for issuer, row in stats.iterrows():
+        first = row['first_due'].strftime('%Y-%m-%d') if row['first_due'] == row['first_due'] else 'N/A'
+        last = row['last_due'].strftime('%Y-%m-%d') if row['last_due'] == row['last_due'] else 'N/A'
+        print(f"  • {issuer}: {row['statements']} statement(s), total due {row['total_due']:,.2f}, "
+              f"mean {row['mean_due']:,.2f}, due dates {first} → {last}")
+
+
+def write_table(df, path: str):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    elif path.endswith('.csv'):
+        df.to_csv(path, index=False, date_format='%Y-%m-%d')
+    elif path.endswith('.pkl'):
+        df.to_pickle(path)
+    else:
+        raise ValueError(f"Unsupported table format for {path} (use .parquet, .csv or .pkl)")
+
+
+def write_typed_results(df, path_prefix: str) -> str:
+    # Parquet when pyarrow is installed, otherwise a pickle that keeps the dtypes
+    try:
+        path = f"{path_prefix}.typed.parquet"
+        write_table(df, path)
+    except ImportError:
+        path = f"{path_prefix}.typed.pkl"
+        write_table(df, path)
+    return path
+
+
+def normalize_files(jsonl_paths: Iterable[str]):
+    import pandas as pd
+
+    frames = [load_results(path) for path in jsonl_paths]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return normalize(df)
+
+
+def main():
+    import sys
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Turn batch results (.jsonl) into a typed table and summarize it")
+    arg_parser.add_argument('results', nargs='+', help="results .jsonl file(s) from batch_test.py")
+    arg_parser.add_argument('--output', help="write the typed table (.parquet, .csv or .pkl)")
+    args = arg_parser.parse_args()
+
+    try:
+        df = normalize_files(args.results)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print_summary(summarize(df))
+    print_statistics(issuer_statistics(df))
+
+    if args.output:
+        try:
+            write_table(df, args.output)
+        except (ImportError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"\n✓ Typed results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
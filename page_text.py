@@ -0,0 +1,290 @@
+import os
+import re
+import time
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from extraction_cache import ExtractionCache
+from instrumentation import current_rss_bytes
+from pdf_source import PdfSource
+
+
+# Fewer pages than this are extracted in-process even with page workers:
+# each worker opens its own copy of the document
+PARALLEL_MIN_PAGES = 8
+
+# One pool of page workers per process, started on first use and kept for
+# the documents after it; replaced if the worker count changes or it breaks
+_page_pool = None
+_page_pool_key = None
+
+
+def _get_page_pool(workers: int):
+    global _page_pool, _page_pool_key
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A pool inherited through fork belongs to the parent
+    key = (os.getpid(), workers)
+    if _page_pool is None or _page_pool_key != key:
+        _shutdown_page_pool()
+        _page_pool = ProcessPoolExecutor(max_workers=workers)
+        _page_pool_key = key
+    return _page_pool
+
+
+def _shutdown_page_pool():
+    global _page_pool, _page_pool_key
+    if _page_pool is not None and _page_pool_key[0] == os.getpid():
+        _page_pool.shutdown(wait=False, cancel_futures=True)
+    _page_pool = None
+    _page_pool_key = None
+
+
+@contextmanager
+def _worker_path(source: PdfSource):
+    # Workers open the document by path and map it, instead of each being
+    # sent a pickled copy; other sources are written to a temporary file once
+    if source.path is not None:
+        yield source.path
+        return
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(source.buffer)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _extract_range(source, backend, start: int, stop: int) -> List[Tuple[str, float, float]]:
+    # Runs in a worker process: (text, wall, cpu) for pages [start, stop)
+    source = PdfSource.open(source)
+    document = backend.open(source)
+    try:
+        pages = []
+        for index in range(start, stop):
+            wall, cpu = time.perf_counter(), time.process_time()
+            text = backend.page_text(document, index)
+            pages.append((text, time.perf_counter() - wall, time.process_time() - cpu))
+        return pages
+    finally:
+        backend.close(document)
+        source.close()
+
+
+def _split_pages(start: int, stop: int, parts: int) -> List[Tuple[int, int]]:
+    # Contiguous ranges of near-equal size, in page order
+    size, extra = divmod(stop - start, parts)
+    ranges = []
+    for part in range(parts):
+        end = start + size + (1 if part < extra else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _join(pages: List[str]) -> str:
+    text = "".join(page + "\n" for page in pages if page)
+    return re.sub(r'\n{2,}', '\n', text)
+
+
+class PageTextProvider:
+
+    def __init__(self, source, backend,
+                 cache: Optional[ExtractionCache] = None, timings=None,
+                 memory_limit: Optional[int] = None, degrade_backend=None,
+                 page_workers: int = 0):
+        # Any path, bytes-like or file object; callers that open several
+        # providers over one statement pass the same PdfSource
+        self.source = PdfSource.open(source)
+        self.backend = backend
+        # What pages are actually read with; differs from backend once degraded
+        self._reader = backend
+        self.cache = cache
+        self.timings = timings
+        self.extraction_failed = False
+        self.page_count = None
+        self._pdf = None
+        self._pages: List[str] = []
+        self._text = None
+        self._cache_key = None
+        self._cached_pages = 0
+        # Bytes of RSS growth allowed while extracting this document; past it
+        # the rest is read with degrade_backend, or extraction stops
+        self.memory_limit = memory_limit
+        self.degrade_backend = degrade_backend
+        self.degraded = None
+        self._rss_baseline = None
+        # Worker processes a large page range is split across; each opens
+        # the document itself and extracts its own contiguous range
+        self.page_workers = page_workers
+
+        if cache is not None:
+            self._load_cache_entry()
+
+    def _load_cache_entry(self):
+        self._cache_key = self.cache.key_for(self.source.sha256(), self.backend.cache_settings())
+        entry = self.cache.get(self._cache_key)
+        if entry is not None:
+            self._pages = list(entry["pages"])
+            self.page_count = entry["page_count"]
+            self._cached_pages = len(self._pages)
+
+    def _open(self):
+        if self._pdf is None:
+            if self.memory_limit is not None and self._rss_baseline is None:
+                self._rss_baseline = current_rss_bytes()
+            self._pdf = self._reader.open(self.source)
+            self.page_count = self._reader.page_count(self._pdf)
+        return self._pdf
+
+    @property
+    def loaded(self) -> int:
+        return len(self._pages)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.page_count is not None and self.loaded >= self.page_count
+
+    def load_pages(self, count: int) -> int:
+        if self.loaded >= count or self.exhausted:
+            return self.loaded
+
+        try:
+            pdf = self._open()
+            if self._parallel(min(count, self.page_count) - self.loaded):
+                self._load_parallel(min(count, self.page_count))
+            while self.loaded < min(count, self.page_count):
+                if self.timings is None:
+                    self._pages.append(self._reader.page_text(pdf, self.loaded))
+                else:
+                    wall, cpu = time.perf_counter(), time.process_time()
+                    self._pages.append(self._reader.page_text(pdf, self.loaded))
+                    self.timings.add_page(self.loaded - 1, time.perf_counter() - wall,
+                                          time.process_time() - cpu)
+                
+                if self.memory_limit is not None and self._over_memory_limit():
+                    pdf = self._degrade()
+                    if pdf is None:
+                        break
+        except Exception as e:
+            self.extraction_failed = True
+            self.page_count = self.loaded
+            print(f"Error extracting text: {e}")
+
+        self._text = None
+        if self.exhausted:
+            self.close()
+        return self.loaded
+
+    def _parallel(self, pages: int) -> bool:
+        # The memory ceiling is measured in this process, so it keeps
+        # extraction here
+        return (self.page_workers > 1 and pages >= PARALLEL_MIN_PAGES
+                and self.memory_limit is None)
+
+    def _load_parallel(self, stop: int):
+        from concurrent.futures.process import BrokenProcessPool
+
+        ranges = _split_pages(self.loaded, stop, min(self.page_workers, stop - self.loaded))
+        pool = _get_page_pool(self.page_workers)
+        with _worker_path(self.source) as path:
+            futures = [pool.submit(_extract_range, path, self._reader, start, end)
+                       for start, end in ranges]
+            try:
+                # Merged in page order, whichever range finishes first
+                for future in futures:
+                    for text, wall, cpu in future.result():
+                        self._pages.append(text)
+                        if self.timings is not None:
+                            self.timings.add_page(self.loaded - 1, wall, cpu)
+            except BrokenProcessPool:
+                _shutdown_page_pool()
+                raise
+            finally:
+                # The pool outlives this document; drop ranges still queued
+                for future in futures:
+                    future.cancel()
+
+    def _over_memory_limit(self) -> bool:
+        return current_rss_bytes() - self._rss_baseline > self.memory_limit
+
+    def _degrade(self):
+        limit_mb = self.memory_limit / (1024 * 1024)
+        self._reader.close(self._pdf)
+        self._pdf = None
+        if self.degrade_backend is not None and self.degraded is None:
+            print(f"⚠ Memory ceiling ({limit_mb:g} MB) reached after {self.loaded} page(s); "
+                  f"reading the rest with {self.degrade_backend.name}")
+            self.degraded = 'raw_text'
+            self._reader = self.degrade_backend
+            # RSS rarely shrinks once grown, so the cheaper backend is
+            # measured from where the layout pass left off
+            self._rss_baseline = current_rss_bytes()
+            self._pdf = self._reader.open(self.source)
+            return self._pdf
+
+        print(f"⚠ Memory ceiling ({limit_mb:g} MB) reached after {self.loaded} page(s); "
+              f"stopping extraction")
+        self.degraded = 'truncated'
+        self.page_count = self.loaded
+        return None
+
+    def load_all(self) -> int:
+        self._open_for_count()
+        return self.load_pages(self.page_count or 0)
+
+    def _open_for_count(self):
+        if self.page_count is None:
+            try:
+                self._open()
+            except Exception as e:
+                self.extraction_failed = True
+                self.page_count = 0
+                print(f"Error extracting text: {e}")
+
+    def _save_cache_entry(self):
+        # Once per close rather than per page: each write rewrites the whole
+        # entry. Degraded text is partial or mixed, so it is never cached.
+        if self._cache_key is None or self.extraction_failed or self.degraded:
+            return
+        if self.loaded <= self._cached_pages:
+            return
+        self.cache.put(self._cache_key, {"pages": self._pages, "page_count": self.page_count})
+        self._cached_pages = self.loaded
+
+    def page_text(self, index: int) -> str:
+        self.load_pages(index + 1)
+        return self._pages[index] if index < self.loaded else ""
+
+    def iter_pages(self) -> Iterator[str]:
+        index = 0
+        while True:
+            self.load_pages(index + 1)
+            if index >= self.loaded:
+                return
+            yield self._pages[index]
+            index += 1
+
+    def text(self) -> str:
+        # Normalized text of the pages loaded so far
+        if self._text is None:
+            self._text = _join(self._pages)
+        return self._text
+
+    def text_from(self, index: int) -> str:
+        # Same normalization, for the loaded pages from index on
+        return _join(self._pages[max(index, 0):])
+
+    def full_text(self) -> str:
+        self.load_all()
+        return self.text()
+
+    def close(self):
+        # Called when the document is exhausted and when a parse is done
+        # with it; pages loaded since the last close are cached here
+        if self._pdf is not None:
+            self._reader.close(self._pdf)
+            self._pdf = None
+        self._save_cache_entry()
@@ -0,0 +1,195 @@
+import os
+import json
+import tempfile
+from typing import Dict, List, Tuple
+from extraction_cache import DEFAULT_CACHE_DIR, file_lock
+
+
+DEFAULT_STATS_PATH = os.environ.get(
+    'CC_PARSER_PATTERN_STATS',
+    os.path.join(DEFAULT_CACHE_DIR, 'pattern_stats.json')
+)
+# Tries without a single hit before a pattern is reported as dead
+DEAD_AFTER_TRIES = 20
+# One document in this many is searched with every alternative and recorded
+DEFAULT_SAMPLE_EVERY = 20
+# Recorded documents kept in memory before save_if_due() writes them out
+SAVE_EVERY = 50
+
+
+class PatternStats:
+    # Per issuer and field, [tries, hits] for each alternative, indexed as in
+    # the registry. Every alternative is searched on a sampled document, so
+    # each rate covers every document it was tried on; the rest stop at the
+    # first hit. Patterns are tried in registry order unless adaptive, which
+    # tries the likeliest first. Where two alternatives both match with
+    # different values that changes which one wins, so it is opt-in.
+
+    def __init__(self, path: str = DEFAULT_STATS_PATH, adaptive: bool = False,
+                 sample_every: int = DEFAULT_SAMPLE_EVERY):
+        self.path = path
+        self.adaptive = adaptive
+        self.sample_every = max(1, sample_every)
+        self.counts: Dict[str, List[List[int]]] = self._read()
+        # Recorded since the last save
+        self._pending: Dict[str, List[List[int]]] = {}
+        self._documents = 0
+        self._unsaved = 0
+
+    def __reduce__(self):
+        # Unpickled in a pool worker as that process's own instance, so its
+        # counts build up across tasks and are saved in batches
+        return _worker_stats, (self.path, self.adaptive, self.sample_every)
+
+    def _read(self) -> Dict[str, List[List[int]]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def order(self, issuer: str, field: str, count: int) -> List[int]:
+        if not self.adaptive:
+            return list(range(count))
+        counts = self.counts.get(f"{issuer}.{field}", [])
+        pending = self._pending.get(f"{issuer}.{field}", [])
+
+        def hit_rate(index: int) -> float:
+            tries = hits = 0
+            for source in (counts, pending):
+                if index < len(source):
+                    tries += source[index][0]
+                    hits += source[index][1]
+            # Smoothed, so an untried pattern sits between ones that hit and
+            # ones that keep missing
+            return (hits + 1) / (tries + 2)
+
+        # Stable: ties keep registry order
+        return sorted(range(count), key=lambda index: -hit_rate(index))
+
+    def sample(self) -> bool:
+        # Called once per document: whether to search every alternative and
+        # record the outcome
+        sampled = self._documents % self.sample_every == 0
+        self._documents += 1
+        return sampled
+
+    def record(self, issuer: str, outcome: Dict[str, List[Tuple[int, bool]]]):
+        # outcome: per field, the (index, matched) of each pattern tried
+        for field, tried in outcome.items():
+            if not tried:
+                continue
+            counts = [[0, 0] for _ in range(max(index for index, _ in tried) + 1)]
+            for index, matched in tried:
+                counts[index][0] += 1
+                counts[index][1] += int(matched)
+            _merge(self._pending.setdefault(f"{issuer}.{field}", []), counts)
+        self._unsaved += 1
+
+    def save_if_due(self):
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        if not self._pending:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with file_lock(self.path + '.lock'):
+                # Other processes may have saved since this one read the file
+                counts = self._read()
+                for key, pending in self._pending.items():
+                    _merge(counts.setdefault(key, []), pending)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(counts, f, sort_keys=True)
+                    os.replace(tmp_path, self.path)
+                except OSError:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        except OSError as e:
+            print(f"⚠ Could not save pattern statistics: {e}")
+            return
+        self.counts = counts
+        self._pending = {}
+        self._unsaved = 0
+
+    def reset(self):
+        self.counts = {}
+        self._pending = {}
+        self._unsaved = 0
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+_worker_instances: Dict[tuple, PatternStats] = {}
+
+
+def _worker_stats(path: str, adaptive: bool, sample_every: int) -> PatternStats:
+    key = (path, adaptive, sample_every)
+    stats = _worker_instances.get(key)
+    if stats is None:
+        from multiprocessing import util
+
+        stats = _worker_instances[key] = PatternStats(path, adaptive, sample_every)
+        # Whatever is still pending is saved when the worker process exits
+        util.Finalize(stats, stats.save, exitpriority=10)
+    return stats
+
+
+def _merge(totals: List[List[int]], counts: List[List[int]]):
+    for index, (tries, hits) in enumerate(counts):
+        if index == len(totals):
+            totals.append([0, 0])
+        totals[index][0] += tries
+        totals[index][1] += hits
+
+
+def print_stats(stats: PatternStats):
+    from issuers import ISSUERS
+
+    if not stats.counts:
+        print(f"No pattern statistics recorded yet ({stats.path})")
+        return
+    print(f"Pattern statistics ({stats.path}):")
+    for code, spec in ISSUERS.items():
+        for field in spec.fields:
+            counts = stats.counts.get(f"{code}.{field.name}")
+            if not counts:
+                continue
+            print(f"\n{code}.{field.name}  (adaptive order {stats.order(code, field.name, len(field.patterns))})")
+            for index, pattern in enumerate(field.patterns):
+                tries, hits = counts[index] if index < len(counts) else (0, 0)
+                if tries == 0:
+                    status = "never tried"
+                else:
+                    status = f"{hits}/{tries} ({hits / tries * 100:.1f}%)"
+                if tries >= DEAD_AFTER_TRIES and hits == 0:
+                    status += "  ✗ dead"
+                print(f"  [{index}] {status:24} {pattern.regex.pattern[:60]}")
+
+
+def main():
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('show', 'reset'):
+        print("Usage: python pattern_stats.py <show|reset> [stats_file]")
+        sys.exit(1)
+
+    # Adaptive, so show prints the order --adaptive-patterns would use
+    stats = PatternStats(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STATS_PATH, adaptive=True)
+
+    if sys.argv[1] == 'reset':
+        stats.reset()
+        print(f"✓ Cleared pattern statistics: {stats.path}")
+    else:
+        print_stats(stats)
+
+
+if __name__ == "__main__":
+    main()
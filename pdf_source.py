@@ -0,0 +1,108 @@
+import io
+import os
+import mmap
+import hashlib
+from typing import Optional
+
+
+class _BufferReader(io.RawIOBase):
+    # Seekable read-only file over a memoryview; reads copy only the bytes
+    # asked for, never the whole buffer
+
+    def __init__(self, buffer: memoryview):
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._buffer[self._pos:self._pos + len(target)]
+        size = len(chunk)
+        target[:size] = chunk
+        self._pos += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        self._buffer = memoryview(b"")
+        super().close()
+
+
+class PdfSource:
+    # One buffer per statement: memory-mapped for paths and real files,
+    # borrowed for bytes-like objects. Hashing and every extraction backend
+    # read the same memory.
+
+    def __init__(self, buffer: memoryview, name: str, path: Optional[str] = None,
+                 mapping: Optional[mmap.mmap] = None):
+        self.buffer = buffer
+        self.name = name
+        self.path = path
+        self._mapping = mapping
+        self._sha256 = None
+
+    @classmethod
+    def open(cls, source, name: Optional[str] = None) -> 'PdfSource':
+        if isinstance(source, PdfSource):
+            return source
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(memoryview(source), name or "<bytes>")
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            with open(path, 'rb') as f:
+                return cls._from_file(f, name or os.path.basename(path), path)
+        if hasattr(source, 'read'):
+            return cls._from_file(source, name or os.path.basename(str(getattr(source, 'name', '')))
+                                  or "<stream>")
+        raise TypeError(f"Cannot read a PDF from {type(source).__name__}")
+
+    @classmethod
+    def _from_file(cls, f, name: str, path: Optional[str] = None) -> 'PdfSource':
+        # The PDF starts at the file's current position, as with read()
+        if isinstance(f, io.BytesIO):
+            return cls(f.getbuffer()[f.tell():], name, path)
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            start = f.tell()
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # Pipes, sockets, archive members and empty files: read the rest
+            # into memory, without seeking (a pipe cannot)
+            return cls(memoryview(f.read()), name, path)
+        with memoryview(mapping) as whole:
+            return cls(whole[start:], name, path, mapping)
+
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.buffer).hexdigest()
+        return self._sha256
+
+    def stream(self) -> io.BufferedReader:
+        return io.BufferedReader(_BufferReader(self.buffer))
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def close(self):
+        if self._mapping is None:
+            return
+        try:
+            self.buffer.release()
+            self._mapping.close()
+        except BufferError:
+            # A backend still holds a view; the mapping goes when it does
+            pass
+        self._mapping = None
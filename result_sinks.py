@@ -0,0 +1,155 @@
+import os
+import csv
+import json
+from typing import List
+
+
+# Fixed column order for the tabular sinks; any other keys stay in the JSONL
+RESULT_COLUMNS = [
+    'filename', 'status', 'issuer', 'statement_period', 'statement_date',
+    'due_date', 'total_amount_due', 'card_last_4', 'previous_balance',
+    'credit_limit', 'error_message', 'duplicate_of',
+]
+FLOAT_COLUMNS = {'total_amount_due', 'previous_balance', 'credit_limit'}
+
+
+class JsonlSink:
+
+    extension = 'jsonl'
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: dict) -> int:
+        # Flushed per record so a crash loses at most the file in flight
+        offset = self._file.tell()
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+        return offset
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    # Appended to on --resume and --watch like the JSONL, so a file parsed
+    # again has an older row above its current one
+
+    extension = 'csv'
+
+    def __init__(self, path: str, append: bool = False, chunk_size: int = 1000):
+        self.path = path
+        self.chunk_size = chunk_size
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+        self._rows: List[dict] = []
+
+    def write(self, record: dict) -> int:
+        self._rows.append(record)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+        return -1
+
+    def flush(self):
+        self._writer.writerows(self._rows)
+        self._file.flush()
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class ParquetSink:
+
+    extension = 'parquet'
+
+    def __init__(self, path: str, append: bool = False, chunk_size: int = 1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        if append and os.path.exists(path):
+            raise ValueError("Parquet output cannot be appended to; use jsonl or csv")
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self._pa = pa
+        self._schema = pa.schema([
+            (column, pa.float64() if column in FLOAT_COLUMNS else pa.string())
+            for column in RESULT_COLUMNS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows: List[dict] = []
+
+    def write(self, record: dict) -> int:
+        self._rows.append(record)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+        return -1
+
+    def flush(self):
+        if not self._rows:
+            return
+        # One row group per chunk
+        columns = {}
+        for column in RESULT_COLUMNS:
+            values = [row.get(column) for row in self._rows]
+            if column not in FLOAT_COLUMNS:
+                values = [None if value is None else str(value) for value in values]
+            columns[column] = values
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+SINK_TYPES = {sink.extension: sink for sink in (JsonlSink, CsvSink, ParquetSink)}
+
+
+def open_sink(fmt: str, path_prefix: str, append: bool = False, chunk_size: int = 1000):
+    if fmt not in SINK_TYPES:
+        raise ValueError(f"Unknown output format '{fmt}' (choose from {', '.join(SINK_TYPES)})")
+
+    sink_type = SINK_TYPES[fmt]
+    path = f"{path_prefix}.{sink_type.extension}"
+    if sink_type is JsonlSink:
+        return JsonlSink(path, append=append)
+    return sink_type(path, append=append, chunk_size=chunk_size)
+
+
+def iter_jsonl(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_latest(path: str, key=None):
+    # --resume and --watch append a file's new record after its old one (a
+    # retried error, a changed file); only the last record per key is kept,
+    # in the order of those last records. key defaults to the filename.
+    if key is None:
+        key = lambda record: record.get('filename')
+    latest = {}
+    for record in iter_jsonl(path):
+        record_key = key(record)
+        latest.pop(record_key, None)
+        latest[record_key] = record
+    return iter(latest.values())
+
+
+def export_excel(jsonl_path: str, excel_path: str, key=None):
+    import pandas as pd
+
+    df = pd.DataFrame(iter_latest(jsonl_path, key))
+    df.to_excel(excel_path, index=False)
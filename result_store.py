@@ -0,0 +1,239 @@
+import re
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from issuers import ISSUERS
+
+
+DEFAULT_STORE_PATH = 'parser_results.db'
+
+_DAY_FIRST = {spec.display_name: spec.day_first for spec in ISSUERS.values()}
+_ISSUER_NAMES = {code.lower(): spec.display_name for code, spec in ISSUERS.items()}
+_DATE_RE = re.compile(r'\s*(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\s*$')
+
+# Dates are stored as ISO text so ranges can use the index
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    content_hash TEXT PRIMARY KEY,
+    filename TEXT,
+    status TEXT,
+    issuer TEXT,
+    card_last_4 TEXT,
+    statement_date TEXT,
+    due_date TEXT,
+    period_start TEXT,
+    period_end TEXT,
+    total_amount_due REAL,
+    previous_balance REAL,
+    credit_limit REAL,
+    duplicate_of TEXT,
+    record TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS statements_issuer ON statements (issuer);
+CREATE INDEX IF NOT EXISTS statements_card_due ON statements (card_last_4, due_date);
+CREATE INDEX IF NOT EXISTS statements_due_date ON statements (due_date);
+"""
+
+_COLUMNS = ['content_hash', 'filename', 'status', 'issuer', 'card_last_4', 'statement_date',
+            'due_date', 'period_start', 'period_end', 'total_amount_due', 'previous_balance',
+            'credit_limit', 'duplicate_of', 'record', 'updated_at']
+
+# A later failure (a timeout, say) never replaces a statement already parsed
+_UPSERT = (
+    f"INSERT INTO statements ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT (content_hash) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+    + " WHERE excluded.status = 'SUCCESS' OR statements.status != 'SUCCESS'"
+)
+
+
+def _iso_date(value: Optional[str], day_first: bool) -> Optional[str]:
+    # strptime is most of the insert cost at this volume
+    match = _DATE_RE.match(value) if value else None
+    if not match:
+        return None
+    first, second, year = (int(part) for part in match.groups())
+    day, month = (first, second) if day_first else (second, first)
+    if year < 100:
+        # Same pivot as strptime's %y
+        year += 2000 if year < 69 else 1900
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _row(record: dict, content_hash: str) -> tuple:
+    day_first = _DAY_FIRST.get(record.get('issuer'), True)
+    period_start = period_end = None
+    if record.get('statement_period') and ' - ' in record['statement_period']:
+        start, end = record['statement_period'].split(' - ', 1)
+        period_start, period_end = _iso_date(start, day_first), _iso_date(end, day_first)
+    return (
+        content_hash,
+        record.get('filename'),
+        record.get('status'),
+        record.get('issuer'),
+        record.get('card_last_4'),
+        _iso_date(record.get('statement_date'), day_first),
+        _iso_date(record.get('due_date'), day_first),
+        period_start,
+        period_end,
+        record.get('total_amount_due'),
+        record.get('previous_balance'),
+        record.get('credit_limit'),
+        record.get('duplicate_of'),
+        json.dumps(record, default=str),
+        datetime.now().isoformat(timespec='seconds'),
+    )
+
+
+class ResultStore:
+    # One row per distinct PDF (its SHA-256), upserted so re-running over the
+    # same files updates rows instead of adding them. Writes are buffered and
+    # committed chunk_size rows per transaction.
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, chunk_size: int = 1000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._rows: List[tuple] = []
+
+    def write(self, record: dict, content_hash: Optional[str]):
+        # Exact copies share the original's hash, and their row is the
+        # original's; files that could not be read have no key
+        if not content_hash or record.get('duplicate_match') == 'sha256':
+            return
+        self._rows.append(_row(record, content_hash))
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        with self._conn:
+            self._conn.executemany(_UPSERT, self._rows)
+        self._rows = []
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        row = self._conn.execute("SELECT record FROM statements WHERE content_hash = ?",
+                                 (content_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, issuer: Optional[str] = None, card_last_4: Optional[str] = None,
+              due_from: Optional[date] = None, due_to: Optional[date] = None,
+              status: Optional[str] = 'SUCCESS', limit: Optional[int] = None) -> Iterator[dict]:
+        # Due dates are inclusive; issuer is a display name or registry code
+        conditions, params = [], []
+        if issuer:
+            conditions.append("issuer = ?")
+            params.append(_ISSUER_NAMES.get(issuer.lower(), issuer))
+        if card_last_4:
+            conditions.append("card_last_4 = ?")
+            params.append(card_last_4)
+        if due_from:
+            conditions.append("due_date >= ?")
+            params.append(due_from.isoformat())
+        if due_to:
+            conditions.append("due_date <= ?")
+            params.append(due_to.isoformat())
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+
+        sql = "SELECT content_hash, due_date, record FROM statements"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY due_date, filename"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        for content_hash, due_date, record in self._conn.execute(sql, params):
+            result = json.loads(record)
+            result['content_hash'] = content_hash
+            result['due_date_iso'] = due_date
+            yield result
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM statements GROUP BY status").fetchall())
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _parse_day(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _due_range(args) -> Tuple[Optional[date], Optional[date]]:
+    due_from = _parse_day(args.due_from) if args.due_from else None
+    due_to = _parse_day(args.due_to) if args.due_to else None
+    if args.due_within_days is not None:
+        due_from = date.today()
+        due_to = due_from + timedelta(days=args.due_within_days)
+    return due_from, due_to
+
+
+def main():
+    import sys
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Query the SQLite result store")
+    arg_parser.add_argument('command', choices=['query', 'stats'])
+    arg_parser.add_argument('--db', default=DEFAULT_STORE_PATH,
+                            help=f"result store path (default: {DEFAULT_STORE_PATH})")
+    arg_parser.add_argument('--issuer', help="display name (e.g. 'HDFC Bank') or code (e.g. HDFC)")
+    arg_parser.add_argument('--card', help="last four digits of the card")
+    arg_parser.add_argument('--due-from', help="earliest due date, YYYY-MM-DD")
+    arg_parser.add_argument('--due-to', help="latest due date, YYYY-MM-DD")
+    arg_parser.add_argument('--due-within-days', type=int,
+                            help="due between today and this many days from now")
+    arg_parser.add_argument('--status', default='SUCCESS',
+                            help="SUCCESS, ERROR, DUPLICATE or 'any' (default: SUCCESS)")
+    arg_parser.add_argument('--limit', type=int, help="at most this many rows")
+    arg_parser.add_argument('--json', action='store_true', help="print one JSON record per line")
+    args = arg_parser.parse_args()
+
+    try:
+        due_from, due_to = _due_range(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with ResultStore(args.db) as store:
+        if args.command == 'stats':
+            for status, count in store.stats().items():
+                print(f"{status:12}: {count}")
+            return
+
+        rows = 0
+        for result in store.query(args.issuer, args.card, due_from, due_to,
+                                  None if args.status == 'any' else args.status, args.limit):
+            rows += 1
+            if args.json:
+                print(json.dumps(result, default=str))
+                continue
+            amount = result.get('total_amount_due')
+            amount = f"{amount:,.2f}" if amount is not None else "N/A"
+            print(f"{result['due_date_iso'] or 'N/A':10}  {result.get('issuer', 'N/A'):16}  "
+                  f"{result.get('card_last_4') or '----':4}  {amount:>12}  {result['filename']}")
+        if not args.json:
+            print(f"\n{rows} statement(s)")
+
+
+if __name__ == "__main__":
+    main()
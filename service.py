@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
+from extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR
+from batch_test import parse_statement, _error_result
+
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_BATCH_SIZE = 8
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+def _warm_worker():
+    # Pay the heavy imports once per worker process instead of per request
+    import pdfplumber
+    import PyPDF2
+    # Parser warnings must not interleave with the NDJSON responses
+    sys.stdout = sys.stderr
+
+
+def _ping() -> bool:
+    return True
+
+
+def _parse_batch(pdf_paths: List[str], timeout: Optional[float],
+                 cache: Optional[ExtractionCache], fast_path: bool) -> List[dict]:
+    return [parse_statement(pdf_path, timeout, cache, fast_path=fast_path)
+            for pdf_path in pdf_paths]
+
+
+class ParseService:
+    # Requests wait in a bounded queue; a dispatcher thread drains whatever
+    # has queued up (up to batch_size) into one pool task, and at most two
+    # batches per worker are in flight. When both are full, submit() blocks
+    # (or raises ServiceBusy), which is the backpressure callers see.
+
+    def __init__(self, workers: int = 2, max_pending: int = DEFAULT_MAX_PENDING,
+                 batch_size: int = DEFAULT_BATCH_SIZE, timeout: Optional[float] = None,
+                 cache: Optional[ExtractionCache] = None, fast_path: bool = True):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.cache = cache
+        self.fast_path = fast_path
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._in_flight = threading.BoundedSemaphore(workers * 2)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'batches': 0}
+        self._executor = None
+        self._dispatcher = None
+
+    def start(self):
+        self._start_pool()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        return self
+
+    def _start_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Spawn every worker now so the first requests don't pay for it
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, pdf_path: str, block: bool = True) -> Future:
+        future = Future()
+        try:
+            self._queue.put((pdf_path, future), block=block)
+        except queue.Full:
+            raise ServiceBusy(f"{self._queue.maxsize} requests already pending")
+        with self._lock:
+            self._stats['submitted'] += 1
+        return future
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            # Never wait for a batch to fill, and only batch once the backlog
+            # exceeds the worker count, so a lightly loaded service still spreads
+            # requests across every worker
+            limit = min(self.batch_size, 1 + self._queue.qsize() // self.workers)
+            while len(batch) < limit:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._in_flight.acquire()
+            paths = [pdf_path for pdf_path, _ in batch]
+            try:
+                task = self._submit_batch(paths)
+            except RuntimeError as e:
+                self._in_flight.release()
+                self._resolve(batch, [_error_result(os.path.basename(pdf_path), f"Service stopped: {e}")
+                                      for pdf_path in paths])
+            else:
+                task.add_done_callback(lambda task, batch=batch: self._batch_done(batch, task))
+            with self._lock:
+                self._stats['batches'] += 1
+            if stop:
+                return
+
+    def _submit_batch(self, paths: List[str]) -> Future:
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            return self._executor.submit(_parse_batch, paths, self.timeout,
+                                         self.cache, self.fast_path)
+        except BrokenProcessPool:
+            # A worker died (segfault, OOM kill) and broke the pool; the
+            # batches it held have already failed, so later ones get a new pool
+            print("⚠ A worker process died; restarting the pool", file=sys.stderr)
+            self._executor.shutdown(wait=False)
+            self._start_pool()
+            return self._executor.submit(_parse_batch, paths, self.timeout,
+                                         self.cache, self.fast_path)
+
+    def _batch_done(self, batch: list, task: Future):
+        self._in_flight.release()
+        try:
+            results = task.result()
+        except Exception as e:
+            results = [_error_result(os.path.basename(pdf_path), f"Worker failed: {e}")
+                       for pdf_path, _ in batch]
+        self._resolve(batch, results)
+
+    def _resolve(self, batch: list, results: List[dict]):
+        with self._lock:
+            for result in results:
+                self._stats['completed'] += 1
+                if result.get('status') != 'SUCCESS':
+                    self._stats['failed'] += 1
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = stats['submitted'] - stats['completed']
+        stats['workers'] = self.workers
+        return stats
+
+    def close(self):
+        # Requests already queued are still parsed before the pool shuts down
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def _parse_request(request) -> dict:
+    if isinstance(request, str):
+        request = {'path': request}
+    if not isinstance(request, dict) or not isinstance(request.get('path'), str):
+        raise ValueError("expected {\"path\": ...}")
+    return request
+
+
+def serve_stdio(service: ParseService, stdin=sys.stdin, stdout=sys.stdout):
+    # One JSON request per line in, one JSON result per line out, in
+    # completion order; an optional "id" is echoed back for correlation
+    write_lock = threading.Lock()
+
+    def respond(response: dict):
+        with write_lock:
+            stdout.write(json.dumps(response, default=str) + '\n')
+            stdout.flush()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = _parse_request(json.loads(line))
+        except ValueError as e:
+            respond({'status': 'ERROR', 'error_message': f"Invalid request: {e}"})
+            continue
+
+        future = service.submit(request['path'])
+        future.add_done_callback(
+            lambda future, request_id=request.get('id'):
+                respond(dict(future.result(), id=request_id)))
+
+
+def serve_http(service: ParseService, host: str, port: int):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, body):
+            payload = json.dumps(body, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            if status == 503:
+                self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, service.stats())
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/parse':
+                self._send(404, {'error': 'Not found'})
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                requests = json.loads(body)
+                if not isinstance(requests, list):
+                    requests = [requests]
+                if not requests:
+                    raise ValueError("no statements to parse")
+                requests = [_parse_request(request) for request in requests]
+            except ValueError as e:
+                self._send(400, {'error': f"Invalid request: {e}"})
+                return
+
+            # Fail fast instead of queueing behind a full service
+            try:
+                futures = [service.submit(request['path'], block=False) for request in requests]
+            except ServiceBusy as e:
+                self._send(503, {'error': f"Busy: {e}"})
+                return
+
+            results = [dict(future.result(), id=request.get('id'))
+                       for request, future in zip(requests, futures)]
+            self._send(200, results if len(results) > 1 else results[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"✓ Listening on http://{host}:{server.server_address[1]} "
+          f"({service.workers} workers)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Keep parser workers warm and parse statements on request "
+                    "(NDJSON over stdin/stdout, or HTTP with --port)")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="worker processes (default: CPU count)")
+    arg_parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                            help="queued requests before new ones block (stdin) or get 503 (HTTP)")
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="most queued requests handed to a worker at once")
+    arg_parser.add_argument('--timeout', type=float, default=None,
+                            help="per-file timeout in seconds")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="always re-extract text instead of using the extraction cache")
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                            help=f"extraction cache directory (default: {DEFAULT_CACHE_DIR})")
+    arg_parser.add_argument('--no-fast-path', action='store_true',
+                            help="always extract with pdfplumber instead of trying PyPDF2 first")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=None,
+                            help="serve HTTP on this port instead of stdin/stdout")
+    args = arg_parser.parse_args()
+
+    if args.workers < 1 or args.max_pending < 1 or args.batch_size < 1:
+        print("Error: --workers, --max-pending and --batch-size must be at least 1")
+        sys.exit(1)
+
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir)
+    service = ParseService(workers=args.workers, max_pending=args.max_pending,
+                           batch_size=args.batch_size, timeout=args.timeout,
+                           cache=cache, fast_path=not args.no_fast_path).start()
+    try:
+        if args.port is not None:
+            serve_http(service, args.host, args.port)
+        else:
+            serve_stdio(service)
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
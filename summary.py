@@ -0,0 +1,95 @@
+COMMON_FIELDS = ['due_date', 'total_amount_due', 'card_last_4']
+OTHER_BANK_FIELDS = ['statement_period', 'previous_balance']
+HDFC_FIELDS = ['statement_date', 'credit_limit']
+
+
+class SummaryCounters:
+    
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.hdfc_successful = 0
+        self.issuers = {}
+        self.extracted = {}
+    
+    def add(self, result: dict):
+        self._apply(result, 1)
+    
+    def remove(self, result: dict):
+        # Used when a file is re-parsed after changing
+        self._apply(result, -1)
+    
+    def _apply(self, result: dict, sign: int):
+        self.total += sign
+        if result['status'] == 'ERROR':
+            self.failed += sign
+        elif result['status'] == 'DUPLICATE':
+            self.duplicates += sign
+        if result['status'] != 'SUCCESS':
+            return
+        
+        self.successful += sign
+        issuer = result.get('issuer', 'Unknown')
+        self.issuers[issuer] = self.issuers.get(issuer, 0) + sign
+        if not self.issuers[issuer]:
+            del self.issuers[issuer]
+        
+        if issuer == 'HDFC Bank':
+            self.hdfc_successful += sign
+            group, fields = 'HDFC', HDFC_FIELDS
+        else:
+            group, fields = 'Others', OTHER_BANK_FIELDS
+        
+        for field in COMMON_FIELDS:
+            if result.get(field) is not None:
+                self.extracted[(field, 'All')] = self.extracted.get((field, 'All'), 0) + sign
+        for field in fields:
+            if result.get(field) is not None:
+                self.extracted[(field, group)] = self.extracted.get((field, group), 0) + sign
+    
+    @property
+    def other_successful(self) -> int:
+        return self.successful - self.hdfc_successful
+
+
+def print_summary(summary: SummaryCounters):
+    print("\n" + "=" * 70)
+    print("SUMMARY")
+    print("=" * 70)
+    
+    if summary.total == 0:
+        print("No statements were processed.")
+        return
+        
+    print(f"\nTotal Statements Processed: {summary.total}")
+    print(f"✓ Successful: {summary.successful}")
+    print(f"❌ Failed: {summary.failed}")
+    if summary.duplicates:
+        print(f"⧉ Duplicates: {summary.duplicates}")
+    
+    if summary.issuers:
+        print("\nIssuers Detected:")
+        for issuer, count in summary.issuers.items():
+            print(f"  • {issuer}: {count} statement(s)")
+    
+    if summary.successful > 0:
+        print("\nData Extraction Completeness:")
+        
+        for field in COMMON_FIELDS:
+            extracted = summary.extracted.get((field, 'All'), 0)
+            percentage = (extracted / summary.successful) * 100
+            print(f"  • {field} (All): {extracted}/{summary.successful} ({percentage:.1f}%)")
+
+        if summary.other_successful > 0:
+            for field in OTHER_BANK_FIELDS:
+                extracted = summary.extracted.get((field, 'Others'), 0)
+                percentage = (extracted / summary.other_successful) * 100
+                print(f"  • {field} (Others): {extracted}/{summary.other_successful} ({percentage:.1f}%)")
+
+        if summary.hdfc_successful > 0:
+            for field in HDFC_FIELDS:
+                extracted = summary.extracted.get((field, 'HDFC'), 0)
+                percentage = (extracted / summary.hdfc_successful) * 100
+                print(f"  • {field} (HDFC): {extracted}/{summary.hdfc_successful} ({percentage:.1f}%)")
@@ -0,0 +1,58 @@
+from array import array
+from typing import Iterable, Iterator, NamedTuple
+
+
+class Transaction(NamedTuple):
+    date: str
+    description: str
+    amount: float
+    dr_cr: str
+
+
+class TransactionTable:
+    # Column-oriented so thousands of rows cost one float per amount rather
+    # than one dict per row; the DataFrame is only built on request.
+
+    columns = Transaction._fields
+
+    def __init__(self, rows: Iterable[Transaction] = ()):
+        self.date = []
+        self.description = []
+        self.amount = array('d')
+        self.dr_cr = []
+        self.extend(rows)
+
+    def append(self, row: Transaction):
+        self.date.append(row.date)
+        self.description.append(row.description)
+        self.amount.append(row.amount)
+        self.dr_cr.append(row.dr_cr)
+
+    def extend(self, rows: Iterable[Transaction]):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for values in zip(self.date, self.description, self.amount, self.dr_cr):
+            yield Transaction(*values)
+
+    def to_dict(self) -> dict:
+        return {
+            "date": list(self.date),
+            "description": list(self.description),
+            "amount": self.amount.tolist(),
+            "dr_cr": list(self.dr_cr),
+        }
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame({
+            "date": self.date,
+            "description": self.description,
+            "amount": pd.Series(self.amount, dtype="float64"),
+            "dr_cr": pd.Categorical(self.dr_cr, categories=["DR", "CR"]),
+        })
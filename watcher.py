@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import select
+import struct
+from typing import Dict, List, Tuple
+
+
+# linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    # Re-stats the directory every interval and reports files whose size or
+    # mtime changed. A file is only reported once it looks the same on two
+    # consecutive polls, so one still being copied in is not parsed half-written.
+
+    name = 'polling'
+
+    def __init__(self, directory: str, interval: float = 2.0):
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._unsettled: Dict[str, Tuple[int, int]] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+        return snapshot
+
+    def wait(self) -> List[str]:
+        time.sleep(self.interval)
+        snapshot = self._scan()
+        ready = [name for name, state in self._unsettled.items() if snapshot.get(name) == state]
+        self._unsettled = {name: state for name, state in snapshot.items()
+                           if self._snapshot.get(name) != state}
+        self._snapshot = snapshot
+        return sorted(ready)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    # Linux only; reports a file when it is closed after writing or moved
+    # into the directory, so the cost is per arrival, not per folder entry
+
+    name = 'inotify'
+
+    def __init__(self, directory: str, interval: float = 2.0):
+        import ctypes
+        import ctypes.util
+
+        self.directory = directory
+        self.interval = interval
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watch = libc.inotify_add_watch(self._fd, os.fsencode(directory),
+                                       IN_CLOSE_WRITE | IN_MOVED_TO)
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self) -> List[str]:
+        readable, _, _ = select.select([self._fd], [], [], self.interval)
+        if not readable:
+            return []
+
+        names = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: report everything and let the
+                # checkpoint filter out what is unchanged
+                return sorted(os.listdir(self.directory))
+            if name:
+                names.add(os.fsdecode(name))
+        return sorted(names)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_watcher(directory: str, interval: float = 2.0, polling: bool = False):
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory, interval)
+        except (OSError, AttributeError) as e:
+            print(f"⚠ inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directory, interval)
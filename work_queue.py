@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+
+
+DEFAULT_SHARD_SIZE = 100
+# A shard whose worker has not renewed its lease for this long is handed to
+# another worker
+DEFAULT_LEASE_SECONDS = 300.0
+
+# Rollback journal rather than WAL: WAL needs shared memory, which network
+# filesystems do not provide
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    files TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_path TEXT
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_expires);
+"""
+
+
+class Shard(NamedTuple):
+    id: int
+    # Names relative to the statements directory, which may be mounted at a
+    # different path on each node
+    files: List[str]
+    attempts: int
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardQueue:
+    # File list partitioned into shards in one SQLite file on shared storage.
+    # Workers lease a shard, renew the lease while they work on it, and
+    # record its result file when done; an expired lease makes the shard
+    # claimable again.
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit, with explicit BEGIN IMMEDIATE where a read decides a write
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None,
+                               check_same_thread=False)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn: Optional[sqlite3.Connection] = None):
+        conn = conn or self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @property
+    def results_dir(self) -> str:
+        return os.path.splitext(self.path)[0] + '_shards'
+
+    def create(self, pdf_files: List[str], shard_size: int = DEFAULT_SHARD_SIZE) -> int:
+        # Returns the number of shards created; a queue that already has
+        # shards is left as it is, so re-running the coordinator is harmless
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]:
+                return 0
+            conn.executemany("INSERT INTO shards (files) VALUES (?)", [
+                (json.dumps(pdf_files[start:start + shard_size]),)
+                for start in range(0, len(pdf_files), shard_size)
+            ])
+        return (len(pdf_files) + shard_size - 1) // shard_size
+
+    def claim(self, worker: str) -> Optional[Shard]:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, files, attempts FROM shards "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker, now + self.lease_seconds, row[0]))
+        return Shard(row[0], json.loads(row[1]), row[2] + 1)
+
+    def renew(self, shard_id: int, worker: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+        # False once the lease has gone to another worker
+        conn = conn or self._conn
+        cursor = conn.execute(
+            "UPDATE shards SET lease_expires = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, shard_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id: int, worker: str, result_path: str) -> bool:
+        # Also accepted after the lease expired, as long as no other worker
+        # has claimed the shard since
+        cursor = self._conn.execute(
+            "UPDATE shards SET status = 'done', result_path = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (result_path, shard_id, worker))
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def leased(self, shard: Shard, worker: str):
+        # Renews the lease in the background while the shard is processed.
+        # Yields an Event that is set if the lease was lost meanwhile.
+        stop, lost = threading.Event(), threading.Event()
+
+        def heartbeat():
+            conn = self._connect()
+            try:
+                while not stop.wait(self.lease_seconds / 3):
+                    try:
+                        if not self.renew(shard.id, worker, conn):
+                            lost.set()
+                            return
+                    except sqlite3.Error as e:
+                        # Shared storage hiccup: try again next beat
+                        print(f"⚠ Could not renew lease on shard {shard.id}: {e}")
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=heartbeat, name=f"lease-{shard.id}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
+
+    def progress(self) -> Dict[str, int]:
+        counts = dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+        expired = self._conn.execute(
+            "SELECT COUNT(*) FROM shards WHERE status = 'leased' AND lease_expires < ?",
+            (time.time(),)).fetchone()[0]
+        counts = {status: counts.get(status, 0) for status in ('pending', 'leased', 'done')}
+        counts['expired'] = expired
+        counts['total'] = sum(counts[status] for status in ('pending', 'leased', 'done'))
+        return counts
+
+    def result_paths(self) -> List[str]:
+        # In shard order, so a merge lists files in the coordinator's order
+        return [path for (path,) in self._conn.execute(
+            "SELECT result_path FROM shards WHERE status = 'done' ORDER BY id")]
+
+    def close(self):
+        self._conn.close()